@@ -4,10 +4,14 @@ File Converter - Streamlit Web GUI
 A simple web interface for converting documents between formats.
 """
 
+import io
 import streamlit as st
-import tempfile
+import time
+import zipfile
 from pathlib import Path
 from converter import DocumentConverter
+from jobs import JobQueue
+from sandbox import ResourceLimits
 
 # Page configuration
 st.set_page_config(
@@ -37,33 +41,69 @@ st.markdown("""
 st.title("📄 File Converter")
 st.markdown("Convert documents between common formats instantly.")
 
-# Initialize converter
-converter = DocumentConverter()
+# Shared across reruns and sessions: one converter and one background job queue
+@st.cache_resource
+def get_converter() -> DocumentConverter:
+    return DocumentConverter()
+
+
+@st.cache_resource
+def get_job_queue() -> JobQueue:
+    # FILE_CONVERTER_CPU_LIMIT / _TIME_LIMIT / _MEMORY_LIMIT sandbox each upload
+    return JobQueue(limits=ResourceLimits.from_env())
+
+
+converter = get_converter()
+job_queue = get_job_queue()
 
 # Format options
 INPUT_FORMATS = ['.txt', '.docx', '.pdf', '.rtf', '.odt', '.html', '.md']
 OUTPUT_FORMATS = ['.txt', '.docx', '.pdf', '.rtf', '.odt', '.html', '.md']
 
+STATUS_ICONS = {'queued': '🕒', 'running': '⏳', 'done': '✅', 'failed': '❌'}
+
+
+def build_zip(jobs) -> bytes:
+    """Pack every finished output into one ZIP (``st.download_button`` needs bytes)."""
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+        used_names = set()
+        for job in jobs:
+            if job.status != 'done':
+                continue
+            for output_format, data in job.outputs.items():
+                name = Path(job.name).stem + output_format
+                if name in used_names:
+                    name = f"{Path(job.name).stem}-{job.job_id[:8]}{output_format}"
+                used_names.add(name)
+                zf.writestr(name, data)
+    return archive.getvalue()
+
+
 # File upload
-uploaded_file = st.file_uploader(
-    "Drop your file here or click to browse",
+uploaded_files = st.file_uploader(
+    "Drop your files here or click to browse",
     type=[fmt.strip('.') for fmt in INPUT_FORMATS],
+    accept_multiple_files=True,
     help="Supported formats: TXT, DOCX, PDF, RTF, ODT, HTML, MD"
 )
 
-if uploaded_file:
+if uploaded_files:
     # Show file info
-    file_ext = Path(uploaded_file.name).suffix.lower()
-    st.info(f"**Uploaded:** {uploaded_file.name} ({uploaded_file.size / 1024:.1f} KB)")
+    total_kb = sum(f.size for f in uploaded_files) / 1024
+    st.info(f"**Uploaded:** {len(uploaded_files)} file(s) ({total_kb:.1f} KB)")
     
     # Output format selector
     col1, col2 = st.columns([2, 1])
     with col1:
-        # Filter out the input format from output options
-        available_outputs = [fmt for fmt in OUTPUT_FORMATS if fmt != file_ext]
-        output_format = st.selectbox(
+        input_exts = {Path(f.name).suffix.lower() for f in uploaded_files}
+        # With a single input format, don't offer converting to itself
+        available_outputs = [fmt for fmt in OUTPUT_FORMATS
+                             if len(input_exts) > 1 or fmt not in input_exts]
+        output_formats = st.multiselect(
             "Convert to:",
             available_outputs,
+            default=available_outputs[:1],
             format_func=lambda x: {
                 '.txt': 'Plain Text (.txt)',
                 '.docx': 'Word Document (.docx)',
@@ -72,47 +112,82 @@ if uploaded_file:
                 '.odt': 'OpenDocument (.odt)',
                 '.html': 'HTML (.html)',
                 '.md': 'Markdown (.md)'
-            }.get(x, x)
+            }.get(x, x),
+            help="Each file is read once and exported to every selected format"
         )
     
-    # Convert button
-    if st.button("🔄 Convert", type="primary", use_container_width=True):
-        with st.spinner("Converting..."):
-            try:
-                # Save uploaded file to temp location with original name
-                tmp_dir = tempfile.mkdtemp()
-                tmp_input_path = Path(tmp_dir) / uploaded_file.name
-                tmp_input_path.write_bytes(uploaded_file.getvalue())
-                
-                # Perform conversion
-                output_path = converter.convert(str(tmp_input_path), output_format)
-                
-                # Read the converted file
-                with open(output_path, 'rb') as f:
-                    converted_data = f.read()
-                
-                # Success message
-                st.success("✅ Conversion complete!")
-                
-                # Download button
-                output_filename = Path(uploaded_file.name).stem + output_format
-                st.download_button(
-                    label=f"⬇️ Download {output_filename}",
-                    data=converted_data,
-                    file_name=output_filename,
-                    mime="application/octet-stream",
-                    use_container_width=True
-                )
-                
-                # Also show where it was saved locally
-                st.caption(f"Also saved to: {output_path}")
-                
-                # Cleanup temp files
-                Path(tmp_input_path).unlink(missing_ok=True)
-                Path(tmp_dir).rmdir()
-                
-            except Exception as e:
-                st.error(f"❌ Conversion failed: {str(e)}")
+    save_copy = st.checkbox(
+        f"Also save a copy to {converter.output_dir}",
+        value=False,
+        help="Conversions run in memory; tick this to keep the results on disk as well"
+    )
+    
+    # Convert button: queue every file in the background
+    if st.button("🔄 Convert", type="primary", use_container_width=True, disabled=not output_formats):
+        st.session_state.job_ids = [
+            job_queue.submit(
+                f.name, f.getvalue(), Path(f.name).suffix.lower(), output_formats,
+                save_as=f.name if save_copy else None
+            ).job_id
+            for f in uploaded_files
+        ]
+    
+    # Jobs live in the shared queue, so finished work survives reruns
+    jobs = [job for job in (job_queue.get(job_id) for job_id in st.session_state.get('job_ids', []))
+            if job is not None]
+    
+    if jobs:
+        finished = sum(1 for job in jobs if job.status in ('done', 'failed'))
+        st.progress(finished / len(jobs), text=f"{finished} of {len(jobs)} file(s) finished")
+        
+        for job in jobs:
+            status = job.status
+            line = f"{STATUS_ICONS[status]} **{job.name}** — {status}"
+            if status == 'done':
+                line += f" in {job.metrics['total_seconds']:.2f} s"
+            elif status == 'failed':
+                line += f": {job.error}"
+            st.markdown(line)
+        
+        if finished < len(jobs):
+            # Poll until the background workers are done
+            time.sleep(1)
+            st.rerun()
+        
+        done_jobs = [job for job in jobs if job.status == 'done']
+        if done_jobs:
+            st.success(f"✅ {len(done_jobs)} of {len(jobs)} file(s) converted!")
+            st.download_button(
+                label="⬇️ Download all as ZIP",
+                data=build_zip(done_jobs),
+                file_name="converted.zip",
+                mime="application/zip",
+                use_container_width=True
+            )
+            
+            for job in done_jobs:
+                metrics = job.metrics
+                for output_path in metrics['output_paths']:
+                    st.caption(f"Also saved to: {output_path}")
+            
+            # Metrics panel
+            with st.expander("📊 Conversion metrics"):
+                for job in done_jobs:
+                    metrics = job.metrics
+                    st.markdown(f"**{job.name}**")
+                    m1, m2, m3, m4 = st.columns(4)
+                    m1.metric("Total time", f"{metrics['total_seconds']:.2f} s")
+                    m2.metric("Input", f"{metrics['bytes_in'] / 1024:.1f} KB")
+                    m3.metric("Output", f"{metrics['bytes_out'] / 1024:.1f} KB")
+                    m4.metric("Peak memory", f"{metrics['peak_rss'] / (1024 * 1024):.0f} MB")
+                    if metrics['pages']:
+                        st.caption(f"{metrics['pages']} page(s): {metrics['text_layer_pages']} from "
+                                   f"text layer, {metrics['ocr_pages']} via OCR")
+                    st.table([
+                        {"Stage": stage, "Seconds": round(seconds, 4),
+                         "Share": f"{seconds / max(metrics['total_seconds'], 1e-9):.0%}"}
+                        for stage, seconds in metrics['stages'].items()
+                    ])
 
 # Footer with supported formats
 with st.expander("ℹ️ Supported Formats"):
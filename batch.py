@@ -0,0 +1,216 @@
+"""
+Batch Conversion
+Convert many files in one run on a process pool, collecting per-file results.
+"""
+
+import glob
+import json
+import time
+from itertools import count
+from concurrent.futures import as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from converter import DocumentConverter
+from ocr import resolve_workers
+from sandbox import ResourceLimits, SandboxError, make_pool
+from workers import init_worker, worker_converter, worker_options
+
+# A job is re-queued once in a fresh pool if its worker process dies underneath it
+MAX_ATTEMPTS = 2
+
+# (input file, sub-directory of the output folder to write into)
+Job = Tuple[str, str]
+
+def collect_inputs(patterns: Iterable[str]) -> List[Job]:
+    """Expand files, glob patterns and directory trees into conversion jobs.
+
+    Files found under a directory keep their relative folder so that outputs with
+    the same name in different folders don't overwrite each other.
+    """
+    jobs: List[Job] = []
+    seen = set()
+
+    def add(path: Path, subdir: str = '') -> None:
+        key = path.resolve()
+        if key not in seen and path.suffix.lower() in DocumentConverter.SUPPORTED_READ_FORMATS:
+            seen.add(key)
+            jobs.append((str(path), subdir))
+
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            for file in sorted(p for p in path.rglob('*') if p.is_file()):
+                relative = file.parent.relative_to(path)
+                add(file, '' if relative == Path('.') else str(relative))
+        elif path.is_file():
+            add(path)
+        else:
+            for match in sorted(glob.glob(pattern, recursive=True)):
+                if Path(match).is_file():
+                    add(Path(match))
+    return jobs
+
+
+def candidate_stems(input_path: str) -> Iterator[str]:
+    """Yield output names for an input, best first: ``report``, ``report-txt``, ``report-txt-2``..."""
+    path = Path(input_path)
+    yield path.stem
+    qualified = f"{path.stem}-{path.suffix.lstrip('.').lower()}"
+    yield qualified
+    for number in count(2):
+        yield f"{qualified}-{number}"
+
+
+def output_stems(jobs: List[Job]) -> Dict[Job, str]:
+    """Pick an output name per job so no two jobs write the same output file.
+
+    Inputs that end up in one output folder with the same stem (``report.docx``
+    and ``report.txt``) would overwrite each other's outputs: the first keeps its
+    stem and later ones are qualified with their extension. Names are compared
+    case-insensitively, as on Windows and macOS file systems.
+    """
+    taken = set()
+    stems: Dict[Job, str] = {}
+    for job in jobs:
+        input_path, subdir = job
+        for stem in candidate_stems(input_path):
+            if (subdir, stem.casefold()) not in taken:
+                taken.add((subdir, stem.casefold()))
+                stems[job] = stem
+                break
+    return stems
+
+
+def _convert_one(job: Job, output_formats: List[str], output_stem: Optional[str] = None) -> Dict:
+    """Convert a single file inside a worker, capturing any failure as a result."""
+    input_path, subdir = job
+    converter = worker_converter()
+    base_dir = converter.output_dir
+    start = time.perf_counter()
+    hits_before = converter.cache.hits if converter.cache is not None else 0
+    result = {'input': input_path, 'outputs': [], 'status': 'ok', 'error': None, 'cached': False,
+              'metrics': None}
+    converter.last_result = None
+    try:
+        if subdir:
+            converter.output_dir = base_dir / subdir
+            converter.output_dir.mkdir(parents=True, exist_ok=True)
+        metrics = converter.convert_with_metrics(input_path, output_formats, output_stem=output_stem)
+        result['outputs'] = metrics.output_paths
+        if converter.cache is not None:
+            result['cached'] = converter.cache.hits > hits_before
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if converter.last_result is not None:
+            result['metrics'] = converter.last_result.to_dict()
+        converter.output_dir = base_dir
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run_batch(jobs: List[Job], output_formats: List[str], workers: int = 0,
+              converter_options: Optional[dict] = None,
+              progress: Optional[Callable[[Dict, int, int], None]] = None,
+              limits: Optional[ResourceLimits] = None) -> Dict:
+    """Convert every job to each output format on a process pool and return a summary.
+
+    Each worker keeps a single warm ``DocumentConverter``. Inputs whose outputs
+    would share a name get distinct ones (see ``output_stems``). Failures are
+    recorded per file and never stop the rest of the batch; ``progress`` is
+    called with each result and the running/total counts as files finish. With ``limits``
+    the pool is a ``SandboxPool``: a file that goes over a budget fails with the
+    breach recorded under ``limit`` and is not retried, while a worker that
+    crashes is retried as on the plain pool.
+    """
+    options = worker_options(converter_options)
+
+    started = time.time()
+    start = time.perf_counter()
+    results: List[Dict] = []
+    attempts: Dict[Job, int] = {}
+    pending = list(jobs)
+    stems = output_stems(jobs)
+
+    while pending:
+        pool_workers = max(1, min(resolve_workers(workers), len(pending)))
+        with make_pool(pool_workers, limits, initializer=init_worker, initargs=(options,)) as pool:
+            futures = {pool.submit(_convert_one, job, output_formats, stems[job]): job for job in pending}
+            pending = []
+            for future in as_completed(futures):
+                job = futures[future]
+                crashed = False
+                try:
+                    result = future.result()
+                except SandboxError as e:
+                    # Going over a budget is final; a worker that just died is retried as below
+                    crashed = not e.over_limit
+                    result = {'input': job[0], 'outputs': [], 'status': 'failed', 'error': str(e),
+                              'cached': False, 'seconds': None, 'metrics': None, 'limit': e.to_dict()}
+                except BrokenProcessPool:
+                    crashed = True
+                if crashed:
+                    attempts[job] = attempts.get(job, 0) + 1
+                    if attempts[job] < MAX_ATTEMPTS:
+                        pending.append(job)
+                        continue
+                    result = {'input': job[0], 'outputs': [], 'status': 'failed',
+                              'error': 'Worker process crashed', 'cached': False, 'seconds': None,
+                              'metrics': None}
+                results.append(result)
+                if progress:
+                    progress(result, len(results), len(jobs))
+
+    order = {job[0]: index for index, job in enumerate(jobs)}
+    results.sort(key=lambda r: order[r['input']])
+    succeeded = sum(1 for r in results if r['status'] == 'ok')
+    return {
+        'output_formats': output_formats,
+        'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(started)),
+        'total_seconds': round(time.perf_counter() - start, 4),
+        'total': len(results),
+        'succeeded': succeeded,
+        'failed': len(results) - succeeded,
+        'files': results,
+    }
+
+
+def format_summary(summary: Dict) -> str:
+    """Render a batch summary as human-readable text."""
+    lines = [
+        f"Batch conversion to {', '.join(summary['output_formats'])} started {summary['started']}",
+        f"  Total:     {summary['total']} file(s) in {summary['total_seconds']:.1f}s",
+        f"  Succeeded: {summary['succeeded']}",
+        f"  Failed:    {summary['failed']}",
+    ]
+    failures = [r for r in summary['files'] if r['status'] != 'ok']
+    if failures:
+        lines.append("")
+        lines.append("Failures:")
+        lines.extend(f"  {r['input']}: {r['error']}" for r in failures)
+    lines.append("")
+    lines.append("Per-file timings:")
+    for r in summary['files']:
+        seconds = f"{r['seconds']:.2f}s" if r['seconds'] is not None else "-"
+        note = " (cached)" if r['cached'] else ""
+        lines.append(f"  {seconds:>9}  {r['status']:<6}  {r['input']}{note}")
+    return "\n".join(lines) + "\n"
+
+
+def write_summary(summary: Dict, json_path: Path) -> Path:
+    """Write the summary as JSON plus a text copy alongside it; return the text path.
+
+    The text copy takes the JSON's name with a ``.txt`` suffix, or ``.summary.txt``
+    when the JSON path already ends in ``.txt`` and the two would collide.
+    """
+    json_path.parent.mkdir(parents=True, exist_ok=True)
+    json_path.write_text(json.dumps(summary, indent=2), encoding='utf-8')
+    if json_path.suffix.lower() == '.txt':
+        text_path = json_path.with_name(f"{json_path.stem}.summary.txt")
+    else:
+        text_path = json_path.with_suffix('.txt')
+    text_path.write_text(format_summary(summary), encoding='utf-8')
+    return text_path
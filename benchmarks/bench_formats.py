@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark every supported input -> output format pair.
+
+Builds the synthetic corpus (see corpus.py), then runs each document through
+DocumentConverter.convert once per writable format, each conversion in a fresh
+process so peak RSS is measured per conversion. Results are written as JSON and,
+given --baseline, compared against an earlier run so regressions stand out.
+
+Usage:
+  python benchmarks/bench_formats.py [--sizes 1K,100K,1M] [--pages 1,5,20]
+                                     [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from converter import DocumentConverter  # noqa: E402
+from corpus import DEFAULT_DIR, DEFAULT_PAGES, DEFAULT_SIZES, generate_corpus  # noqa: E402
+
+# Timings below this are dominated by noise and never count as regressions
+NOISE_FLOOR_SECONDS = 0.01
+
+
+def _peak_rss_mb() -> float:
+    """High-water RSS of the current process in MB."""
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(input_path: str, output_format: str, out_dir: str, queue) -> None:
+    """Convert one file in this (fresh) process and report timing and memory."""
+    try:
+        converter = DocumentConverter()
+        converter.output_dir = Path(out_dir)
+        baseline_rss = _peak_rss_mb()
+        start = time.perf_counter()
+        output = converter.convert(input_path, output_format)
+        seconds = time.perf_counter() - start
+        queue.put({
+            "seconds": seconds,
+            "peak_rss_mb": round(_peak_rss_mb(), 2),
+            "rss_growth_mb": round(_peak_rss_mb() - baseline_rss, 2),
+            "output_bytes": Path(output).stat().st_size,
+        })
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_pair(ctx, input_path: Path, output_format: str, out_dir: str, timeout: float) -> dict:
+    """Run a single conversion in a child process, killing it after ``timeout`` seconds."""
+    queue = ctx.Queue()
+    process = ctx.Process(target=_measure, args=(str(input_path), output_format, out_dir, queue))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.kill()
+        process.join()
+        return {"error": f"timed out after {timeout:.0f}s"}
+    if queue.empty():
+        return {"error": f"worker exited with code {process.exitcode}"}
+    return queue.get()
+
+
+def run_benchmarks(files: list[Path], repeat: int, timeout: float) -> list[dict]:
+    """Benchmark every file against every writable format, keeping the best of ``repeat``."""
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    with tempfile.TemporaryDirectory() as out_dir:
+        for input_path in files:
+            input_bytes = input_path.stat().st_size
+            for output_format in sorted(DocumentConverter.SUPPORTED_WRITE_FORMATS):
+                runs = [run_pair(ctx, input_path, output_format, out_dir, timeout) for _ in range(repeat)]
+                ok = [r for r in runs if "error" not in r]
+                entry = {
+                    "input": input_path.name,
+                    "input_format": input_path.suffix,
+                    "output_format": output_format,
+                    "input_bytes": input_bytes,
+                }
+                if ok:
+                    best = min(ok, key=lambda r: r["seconds"])
+                    entry.update(best)
+                    entry["seconds"] = round(best["seconds"], 4)
+                    entry["mb_per_s"] = round(input_bytes / (1024 * 1024) / max(best["seconds"], 1e-9), 3)
+                else:
+                    entry["error"] = runs[0]["error"]
+                results.append(entry)
+                print(format_row(entry), flush=True)
+    return results
+
+
+def format_row(entry: dict) -> str:
+    pair = f"{entry['input']} -> {entry['output_format']}"
+    if "error" in entry:
+        return f"  {pair:<34} ERROR {entry['error']}"
+    return (f"  {pair:<34} {entry['seconds']:>9.3f}s {entry['mb_per_s']:>9.2f} MB/s "
+            f"{entry['peak_rss_mb']:>8.1f} MB peak")
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """Return a line for every pair that got slower or hungrier than the baseline."""
+    previous = {(r["input"], r["output_format"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for entry in results:
+        old = previous.get((entry["input"], entry["output_format"]))
+        if old is None or "error" in old:
+            continue
+        pair = f"{entry['input']} -> {entry['output_format']}"
+        if "error" in entry:
+            regressions.append(f"  {pair}: now fails ({entry['error']})")
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if metric == "seconds" and entry[metric] < NOISE_FLOOR_SECONDS:
+                continue
+            if old[metric] and entry[metric] > old[metric] * (1 + threshold):
+                change = (entry[metric] / old[metric] - 1) * 100
+                regressions.append(f"  {pair}: {metric} {old[metric]} -> {entry[metric]} (+{change:.0f}%)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_DIR, help="Corpus directory")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="Comma-separated text sizes, e.g. 1K,100K,1M,10M,100M")
+    parser.add_argument("--pages", default=DEFAULT_PAGES, help="Comma-separated scanned page counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per pair (best is kept)")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds allowed per conversion")
+    parser.add_argument("--output", type=Path, default=Path("bench-results.json"),
+                        help="Where to write the JSON results")
+    parser.add_argument("--baseline", type=Path, help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative slowdown that counts as a regression (default 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    pages = [int(p) for p in args.pages.split(",") if p]
+    print(f"Generating corpus in {args.corpus}...")
+    files = generate_corpus(args.corpus, args.sizes.split(","), pages)
+
+    print(f"Benchmarking {len(files)} documents x {len(DocumentConverter.SUPPORTED_WRITE_FORMATS)} formats")
+    results = run_benchmarks(files, args.repeat, args.timeout)
+
+    report = {
+        "meta": {
+            "date": datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            print("\n".join(regressions))
+            return 1
+        print(f"\nNo regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
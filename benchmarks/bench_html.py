@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming HTML text extractor against BeautifulSoup.
+
+Generates large HTML documents shaped like mail archives and generated reports
+(nested divs, tables, links, entities, inline scripts and styles) from the
+synthetic corpus text, then extracts their text with the streaming reader
+(htmltext.py) and with the previous BeautifulSoup implementation, each read in a
+fresh process so peak RSS is per read. The extracted text of both is compared.
+
+Usage:
+  python benchmarks/bench_html.py [--sizes 1M,10M] [--repeat 1] [--output html.json]
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+from xml.sax.saxutils import escape
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from converter import DocumentConverter  # noqa: E402
+from metrics import current_rss  # noqa: E402
+from corpus import DEFAULT_DIR, parse_size, synthetic_text  # noqa: E402
+
+
+def soup_lines(path: Path) -> Iterator[str]:
+    """The extraction ``_read_html`` did before: build a tree, drop scripts and styles."""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(path.read_text(encoding="utf-8"), "html.parser")
+    for element in soup(["script", "style"]):
+        element.decompose()
+    return iter(soup.get_text(separator="\n", strip=True).split("\n"))
+
+
+def stream_lines(path: Path) -> Iterator[str]:
+    return DocumentConverter()._iter_html(path)
+
+
+READERS = {"soup": soup_lines, "stream": stream_lines}
+
+
+def write_large_html(path: Path, paragraphs: list[str]) -> None:
+    """Write an HTML "archive" with one message block per five paragraphs."""
+    with open(path, "w", encoding="utf-8") as out:
+        out.write("<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Archive &amp; report</title>"
+                  "<style>.msg { margin: 1em } td > b { color: #333 }</style></head>\n<body>\n")
+        for start in range(0, len(paragraphs), 5):
+            number = start // 5 + 1
+            out.write(f'<div class="msg" id="m{number}"><table class="headers">'
+                      f'<tr><td><b>From:</b></td><td>User {number % 97} &lt;user{number % 97}@example.com&gt;</td></tr>'
+                      f'<tr><td><b>Subject:</b></td><td>Re: report #{number} &ndash; status</td></tr></table>\n')
+            for paragraph in paragraphs[start:start + 5]:
+                words = escape(paragraph).split(" ")
+                if len(words) > 8:
+                    words[3] = f'<a href="https://example.com/{number}">{words[3]}</a>'
+                    words[6] = f"<em>{words[6]}</em>"
+                out.write(f"<p>{' '.join(words)}</p>\n")
+            if number % 10 == 0:
+                out.write(f"<script>if (window.count > {number}) {{ track('m{number}'); }}</script>\n")
+            out.write("<!-- end of message --></div>\n")
+        out.write("</body></html>\n")
+
+
+def _measure(reader: str, path: str, queue) -> None:
+    """Extract one document in this (fresh) process and report time, memory and a digest."""
+    try:
+        # ru_maxrss would include the parent's peak from before exec, so sample instead
+        baseline = peak = current_rss()
+        start = time.perf_counter()
+        digest = hashlib.sha256()
+        lines = 0
+        for line in READERS[reader](Path(path)):
+            digest.update(line.encode("utf-8") + b"\n")
+            lines += 1
+            if lines % 1000 == 0:
+                peak = max(peak, current_rss())
+        seconds = time.perf_counter() - start
+        peak = max(peak, current_rss())
+        queue.put({
+            "seconds": seconds,
+            "peak_rss_mb": round(peak / (1024 * 1024), 2),
+            "rss_growth_mb": round((peak - baseline) / (1024 * 1024), 2),
+            "lines": lines,
+            "digest": digest.hexdigest(),
+        })
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_reader(ctx, reader: str, path: Path, repeat: int) -> dict:
+    """Run ``reader`` on ``path`` ``repeat`` times in child processes, keeping the fastest."""
+    best = None
+    for _ in range(repeat):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_measure, args=(reader, str(path), queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        if "error" in result:
+            return result
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1M,10M", help="Comma-separated text sizes")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per reader (fastest is kept)")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    DEFAULT_DIR.mkdir(parents=True, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    print(f"{'document':<20} {'reader':<8} {'seconds':>9} {'peak MB':>9} {'growth MB':>10} {'match':>6}")
+    for label in args.sizes.split(","):
+        path = DEFAULT_DIR / f"archive-{label}.html"
+        if not path.exists():
+            write_large_html(path, synthetic_text(parse_size(label)).split("\n\n"))
+
+        digest = None
+        for reader in READERS:
+            result = run_reader(ctx, reader, path, args.repeat)
+            result.update(document=path.name, reader=reader, file_bytes=path.stat().st_size)
+            results.append(result)
+            if "error" in result:
+                print(f"{path.name:<20} {reader:<8} {result['error']}")
+                continue
+            digest = digest or result["digest"]
+            print(f"{path.name:<20} {reader:<8} {result['seconds']:>9.3f} {result['peak_rss_mb']:>9.1f} "
+                  f"{result['rss_growth_mb']:>10.1f} {'yes' if digest == result['digest'] else 'NO':>6}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+    if any(result.get("error") for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
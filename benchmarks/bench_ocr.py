@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark OCR profiles: throughput against accuracy.
+
+Renders a reference scan with known text (see corpus.py), OCRs it with every
+profile in ocr.PROFILES (plus the untuned defaults) and reports pages per second
+alongside character and word accuracy against the ground truth.
+
+Usage:
+  python benchmarks/bench_ocr.py [--pages 5] [--font-size 28] [--repeat 1]
+                                 [--profiles default,fast,balanced,accurate]
+                                 [--output ocr-results.json]
+"""
+
+import argparse
+import difflib
+import json
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from ocr import OCREngine, OCRSettings, PROFILES  # noqa: E402
+from corpus import DEFAULT_DIR, write_scanned_pdf  # noqa: E402
+
+
+def accuracy(expected: str, actual: str) -> tuple[float, float]:
+    """Return (character, word) similarity of ``actual`` to ``expected``, from 0 to 1."""
+    expected_words, actual_words = expected.split(), actual.split()
+    chars = difflib.SequenceMatcher(None, " ".join(expected_words), " ".join(actual_words),
+                                    autojunk=False).ratio()
+    words = difflib.SequenceMatcher(None, expected_words, actual_words, autojunk=False).ratio()
+    return chars, words
+
+
+def run_profile(name: str, settings: OCRSettings, scan: Path, truth: str, pages: int,
+                repeat: int) -> dict:
+    """OCR the reference scan with one profile, keeping the fastest of ``repeat`` runs."""
+    # The text layer is skipped so every page really goes through Tesseract
+    engine = OCREngine(text_layer=False, settings=settings)
+    best = None
+    text = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = engine.extract_text(scan)
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    chars, words = accuracy(truth, text)
+    return {
+        "profile": name,
+        "settings": settings.tag(),
+        "seconds": round(best, 3),
+        "pages_per_second": round(pages / best, 3),
+        "rasterize_seconds": round(engine.stage_times.get("rasterize", 0.0), 3),
+        "ocr_seconds": round(engine.stage_times.get("ocr", 0.0), 3),
+        "char_accuracy": round(chars, 4),
+        "word_accuracy": round(words, 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=5, help="Pages in the reference scan")
+    parser.add_argument("--font-size", type=int, default=28, help="Font size of the rendered text")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per profile (fastest is kept)")
+    parser.add_argument("--profiles", default="default," + ",".join(PROFILES),
+                        help="Comma-separated profiles to compare")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    DEFAULT_DIR.mkdir(parents=True, exist_ok=True)
+    scan = DEFAULT_DIR / f"reference-{args.pages}p-{args.font_size}pt.pdf"
+    truth = write_scanned_pdf(scan, args.pages, font_size=args.font_size)
+
+    results = []
+    print(f"{'profile':<10} {'pages/s':>8} {'seconds':>8} {'chars':>7} {'words':>7}")
+    for name in args.profiles.split(","):
+        settings = OCRSettings() if name == "default" else PROFILES[name]
+        result = run_profile(name, settings, scan, truth, args.pages, args.repeat)
+        results.append(result)
+        print(f"{name:<10} {result['pages_per_second']:>8.2f} {result['seconds']:>8.2f} "
+              f"{result['char_accuracy']:>7.1%} {result['word_accuracy']:>7.1%}")
+
+    if args.output:
+        args.output.write_text(json.dumps({"pages": args.pages, "font_size": args.font_size,
+                                           "results": results}, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming DOCX/ODT readers against the object-model readers.
+
+Generates large Word and OpenDocument files from the synthetic corpus text, then
+reads each one through the streaming XML path (officexml.py) and through
+python-docx / odfpy, each read in a fresh process so peak RSS is per read. The
+extracted text of both paths is compared to make sure they agree.
+
+Usage:
+  python benchmarks/bench_office.py [--sizes 1M,10M] [--repeat 1] [--output office.json]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import sys
+import time
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from converter import DocumentConverter  # noqa: E402
+from metrics import current_rss  # noqa: E402
+from corpus import DEFAULT_DIR, parse_size, synthetic_text  # noqa: E402
+
+DOCX_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+    '<w:body>{body}<w:sectPr/></w:body></w:document>'
+)
+ODT_XML = (
+    '<?xml version="1.0" encoding="UTF-8"?>'
+    '<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+    'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0" office:version="1.2">'
+    '<office:body><office:text>{body}</office:text></office:body></office:document-content>'
+)
+
+# Reader name -> (format, method on DocumentConverter returning paragraphs)
+READERS = {
+    "docx-stream": (".docx", "_docx_paragraphs"),
+    "docx-model": (".docx", "_read_docx_model"),
+    "odt-stream": (".odt", "_odt_paragraphs"),
+    "odt-model": (".odt", "_read_odt_model"),
+}
+
+
+def _replace_part(template: bytes, part: str, xml: str, path: Path) -> None:
+    """Copy a small package, swapping in a generated main XML part."""
+    with zipfile.ZipFile(io.BytesIO(template)) as src, \
+            zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            data = xml.encode("utf-8") if item.filename == part else src.read(item.filename)
+            # ODF requires an uncompressed mimetype entry first
+            compress = zipfile.ZIP_STORED if item.filename == "mimetype" else zipfile.ZIP_DEFLATED
+            dst.writestr(item.filename, data, compress_type=compress)
+
+
+def write_large_docx(path: Path, paragraphs: list[str]) -> None:
+    """Write a DOCX whose paragraphs each hold one run per sentence, as word processors do."""
+    from docx import Document as DocxDocument
+    template = io.BytesIO()
+    DocxDocument().save(template)
+    body = "".join(
+        "<w:p>" + "".join(f'<w:r><w:t xml:space="preserve">{escape(sentence)}. </w:t></w:r>'
+                          for sentence in paragraph.split(". ")) + "</w:p>"
+        for paragraph in paragraphs
+    )
+    _replace_part(template.getvalue(), "word/document.xml", DOCX_XML.format(body=body), path)
+
+
+def write_large_odt(path: Path, paragraphs: list[str]) -> None:
+    """Write an ODT with one ``text:p`` per paragraph and a span per sentence."""
+    from odf.opendocument import OpenDocumentText
+    template = io.BytesIO()
+    OpenDocumentText().write(template)
+    body = "".join(
+        "<text:p>" + "".join(f"<text:span>{escape(sentence)}. </text:span>"
+                             for sentence in paragraph.split(". ")) + "</text:p>"
+        for paragraph in paragraphs
+    )
+    _replace_part(template.getvalue(), "content.xml", ODT_XML.format(body=body), path)
+
+
+def _measure(reader: str, path: str, queue) -> None:
+    """Read one document in this (fresh) process and report time, memory and a text digest."""
+    try:
+        converter = DocumentConverter()
+        method = getattr(converter, READERS[reader][1])
+        # ru_maxrss would include the parent's peak from before exec, so sample instead
+        baseline = peak = current_rss()
+        start = time.perf_counter()
+        digest = hashlib.sha256()
+        paragraphs = 0
+        for paragraph in method(Path(path)):
+            digest.update(paragraph.encode("utf-8") + b"\0")
+            paragraphs += 1
+            if paragraphs % 500 == 0:
+                peak = max(peak, current_rss())
+        seconds = time.perf_counter() - start
+        peak = max(peak, current_rss())
+        queue.put({
+            "seconds": seconds,
+            "peak_rss_mb": round(peak / (1024 * 1024), 2),
+            "rss_growth_mb": round((peak - baseline) / (1024 * 1024), 2),
+            "paragraphs": paragraphs,
+            "digest": digest.hexdigest(),
+        })
+    except Exception as e:
+        queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_reader(ctx, reader: str, path: Path, repeat: int) -> dict:
+    """Run ``reader`` on ``path`` ``repeat`` times in child processes, keeping the fastest."""
+    best = None
+    for _ in range(repeat):
+        queue = ctx.Queue()
+        process = ctx.Process(target=_measure, args=(reader, str(path), queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        if "error" in result:
+            return result
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1M,10M", help="Comma-separated text sizes")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per reader (fastest is kept)")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    DEFAULT_DIR.mkdir(parents=True, exist_ok=True)
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    print(f"{'document':<18} {'reader':<12} {'seconds':>9} {'peak MB':>9} {'growth MB':>10} {'match':>6}")
+    for label in args.sizes.split(","):
+        paragraphs = synthetic_text(parse_size(label)).split("\n\n")
+        documents = {".docx": DEFAULT_DIR / f"large-{label}.docx", ".odt": DEFAULT_DIR / f"large-{label}.odt"}
+        if not documents[".docx"].exists():
+            write_large_docx(documents[".docx"], paragraphs)
+        if not documents[".odt"].exists():
+            write_large_odt(documents[".odt"], paragraphs)
+
+        digests = {}
+        for reader, (fmt, _) in READERS.items():
+            path = documents[fmt]
+            result = run_reader(ctx, reader, path, args.repeat)
+            result.update(document=path.name, reader=reader, file_bytes=path.stat().st_size)
+            results.append(result)
+            if "error" in result:
+                print(f"{path.name:<18} {reader:<12} {result['error']}")
+                continue
+            match = digests.setdefault(fmt, result["digest"]) == result["digest"]
+            print(f"{path.name:<18} {reader:<12} {result['seconds']:>9.3f} {result['peak_rss_mb']:>9.1f} "
+                  f"{result['rss_growth_mb']:>10.1f} {'yes' if match else 'NO':>6}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+    if any(result.get("error") for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark text-to-PDF throughput for each PDF layout and font.
+
+Writes the synthetic corpus text (see corpus.py) to PDF with the "bulk" and
+"lines" layouts, using Helvetica and optionally an embedded TTF font, and reports
+MB/s and pages/s. It also times how long registering the TTF font takes for the
+first document of a process and for later ones, which reuse the parsed metrics.
+
+Usage:
+  python benchmarks/bench_pdf.py [--sizes 10M] [--layouts bulk,lines]
+                                 [--font auto|PATH] [--documents 20]
+                                 [--output pdf.json]
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import pdfwriter  # noqa: E402
+from corpus import parse_size, synthetic_text  # noqa: E402
+
+
+def run_layout(text: str, layout: str, font) -> dict:
+    """Write ``text`` to an in-memory PDF and return its timing."""
+    output = io.BytesIO()
+    start = time.perf_counter()
+    pdfwriter.write_text_pdf(output, text.split("\n"), font=font, layout=layout)
+    seconds = time.perf_counter() - start
+    pages = output.getvalue().count(b"/Type /Page\n")
+    return {
+        "seconds": round(seconds, 3),
+        "mb_per_second": round(len(text.encode("utf-8")) / (1024 * 1024) / seconds, 3),
+        "pages": pages,
+        "pages_per_second": round(pages / seconds, 1),
+        "pdf_bytes": len(output.getvalue()),
+    }
+
+
+def time_font_loads(font: Path, documents: int) -> dict:
+    """Time registering ``font`` on a fresh document, uncached and then cached."""
+    from fpdf import FPDF
+    pdfwriter.clear_font_cache()
+    timings = []
+    for _ in range(documents):
+        pdf = FPDF()
+        start = time.perf_counter()
+        pdfwriter.add_cached_font(pdf, font)
+        timings.append(time.perf_counter() - start)
+    later = timings[1:] or timings
+    return {
+        "font": str(font),
+        "first_ms": round(timings[0] * 1000, 2),
+        "cached_ms": round(sum(later) / len(later) * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10M", help="Comma-separated text sizes")
+    parser.add_argument("--layouts", default=",".join(pdfwriter.PDF_LAYOUTS),
+                        help="Comma-separated layouts to compare")
+    parser.add_argument("--font", help="TTF font to benchmark next to Helvetica ('auto' = system font)")
+    parser.add_argument("--documents", type=int, default=20,
+                        help="Documents created when timing font registration")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    fonts = {"helvetica": None}
+    if args.font:
+        font = pdfwriter.resolve_font(args.font)
+        if font is None:
+            parser.error("no Unicode TTF font found on this system; pass --font PATH")
+        fonts[font.stem] = font
+
+    results = {"conversions": [], "font_loads": []}
+    print(f"{'size':<6} {'layout':<7} {'font':<16} {'seconds':>9} {'MB/s':>7} {'pages':>7} {'pages/s':>8}")
+    for label in args.sizes.split(","):
+        text = synthetic_text(parse_size(label))
+        for layout in args.layouts.split(","):
+            for name, font in fonts.items():
+                result = run_layout(text, layout, font)
+                result.update(size=label, layout=layout, font=name)
+                results["conversions"].append(result)
+                print(f"{label:<6} {layout:<7} {name:<16} {result['seconds']:>9.2f} "
+                      f"{result['mb_per_second']:>7.2f} {result['pages']:>7} "
+                      f"{result['pages_per_second']:>8.1f}")
+
+    for name, font in fonts.items():
+        if font is None:
+            continue
+        loads = time_font_loads(font, args.documents)
+        results["font_loads"].append(loads)
+        print(f"\nRegistering {name}: {loads['first_ms']:.1f} ms for the first document, "
+              f"{loads['cached_ms']:.1f} ms for each later one (parsed metrics reused)")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
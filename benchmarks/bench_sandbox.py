@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-file overhead of sandboxed conversion workers.
+
+Converts many small in-memory documents (.txt -> .html) on the plain process pool,
+on a SandboxPool with CPU, wall-time and memory limits (warm workers reused from
+file to file), and on a SandboxPool that starts a fresh worker for every file, and
+reports files per second and overhead per file. Then it sends one file that goes
+over the time limit and measures how long it takes until the replacement worker
+has converted the next file.
+
+Usage:
+  python benchmarks/bench_sandbox.py [--files 2000] [--jobs 4] [--output sandbox.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from jobs import _run_job  # noqa: E402
+from sandbox import ResourceLimits, SandboxError, SandboxPool  # noqa: E402
+from workers import init_worker  # noqa: E402
+from corpus import synthetic_text  # noqa: E402
+
+OPTIONS = {'workers': 1, 'cache': None}
+LIMITS = ResourceLimits(cpu_seconds=30, wall_seconds=30, memory_mb=1024)
+
+
+def make_pool(kind: str, jobs: int, limits: ResourceLimits = LIMITS):
+    ctx = multiprocessing.get_context('spawn')
+    if kind == 'process-pool':
+        return ProcessPoolExecutor(jobs, mp_context=ctx, initializer=init_worker, initargs=(OPTIONS,))
+    return SandboxPool(jobs, limits, initializer=init_worker, initargs=(OPTIONS,), mp_context=ctx,
+                       max_jobs_per_worker=1 if kind == 'fresh-worker' else None)
+
+
+def run_pool(kind: str, documents: list, jobs: int) -> dict:
+    """Warm the pool up, then convert every document and time it."""
+    with make_pool(kind, jobs) as pool:
+        for future in [pool.submit(_run_job, documents[0], '.txt', ['.html'], None) for _ in range(jobs)]:
+            future.result()
+        start = time.perf_counter()
+        futures = [pool.submit(_run_job, data, '.txt', ['.html'], None) for data in documents]
+        converted = sum(1 for future in futures if future.result()[0])
+        seconds = time.perf_counter() - start
+    return {'pool': kind, 'files': converted, 'seconds': round(seconds, 3),
+            'files_per_second': round(converted / seconds, 1),
+            'ms_per_file': round(seconds * 1000 * jobs / converted, 3)}
+
+
+def recovery(documents: list) -> dict:
+    """Time from a limit breach to the next file converted on the replacement worker."""
+    huge = synthetic_text(20 * 1024 * 1024).encode('utf-8')
+    with make_pool('sandbox', 1, ResourceLimits(wall_seconds=0.2)) as pool:
+        pool.submit(_run_job, documents[0], '.txt', ['.html'], None).result()
+        breach = pool.submit(_run_job, huge, '.txt', ['.docx'], None)
+        after = pool.submit(_run_job, documents[0], '.txt', ['.html'], None)
+        try:
+            breach.result()
+            reason = None
+        except SandboxError as e:
+            reason = e.reason
+        stopped = time.perf_counter()
+        after.result()
+        return {'reason': reason, 'replace_and_convert_seconds': round(time.perf_counter() - stopped, 3)}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=2000, help="Documents to convert per pool")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="Worker processes")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    text = synthetic_text(64 * 1024)
+    documents = [f"Document {index}\n\n{text[index % 4096:][:2048]}".encode('utf-8')
+                 for index in range(args.files)]
+    results = {'pools': [], 'limits': asdict(LIMITS)}
+    print(f"{'pool':<14} {'files':>7} {'seconds':>9} {'files/s':>9} {'ms/file':>9}")
+    for kind in ('process-pool', 'sandbox', 'fresh-worker'):
+        count = args.files if kind != 'fresh-worker' else max(args.jobs, args.files // 20)
+        result = run_pool(kind, documents[:count], args.jobs)
+        results['pools'].append(result)
+        print(f"{kind:<14} {result['files']:>7} {result['seconds']:>9.2f} "
+              f"{result['files_per_second']:>9.1f} {result['ms_per_file']:>9.2f}")
+
+    results['recovery'] = recovery(documents)
+    print(f"\nA file over the time limit failed with '{results['recovery']['reason']}'; the "
+          f"replacement worker converted the next file {results['recovery']['replace_and_convert_seconds']:.2f}s later")
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+    if results['recovery']['reason'] != 'wall_time':
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark converter startup time.
+
+Times `import converter`, the same import with every format backend loaded
+eagerly (the pre-registry behaviour) and a small txt -> md run of convert.py, each
+in a fresh interpreter. Fails if a format backend is imported at startup or the
+median import time exceeds --max-ms, so import regressions show up in CI.
+
+Usage:
+  python benchmarks/bench_startup.py [--runs 10] [--max-ms 150] [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Top-level packages that must only load when their format is used
+BACKENDS = ["docx", "fpdf", "odf", "striprtf", "bs4", "markdown", "pdf2image", "pytesseract", "PIL"]
+
+EAGER_IMPORTS = (
+    "import converter, docx, fpdf, odf.opendocument, striprtf.striprtf, bs4, markdown, "
+    "pdf2image, pytesseract, PIL.Image"
+)
+
+
+def time_command(cmd: list[str], runs: int, env: dict) -> list[float]:
+    """Run a command ``runs`` times and return the wall-clock durations in ms."""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=REPO_ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def leaked_backends(env: dict) -> list[str]:
+    """Return the format backends loaded just by importing the CLI."""
+    probe = (
+        "import sys, json, convert; "
+        f"print(json.dumps([m for m in {BACKENDS!r} if m in sys.modules]))"
+    )
+    output = subprocess.run([sys.executable, "-c", probe], cwd=REPO_ROOT, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    return json.loads(output)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=10, help="Interpreter launches per case")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="Fail if the median `import converter` time exceeds this")
+    parser.add_argument("--json", metavar="PATH", help="Write results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        # Keep convert.py's output folder and cache out of the real home directory
+        env = dict(os.environ, HOME=home, USERPROFILE=home)
+        sample = Path(home) / "sample.txt"
+        sample.write_text("Startup benchmark\n" * 20, encoding="utf-8")
+
+        cases = {
+            "import converter": [sys.executable, "-c", "import converter"],
+            "import converter + all backends": [sys.executable, "-c", EAGER_IMPORTS],
+            "convert.py txt -> md": [sys.executable, "convert.py", str(sample), ".md", "--no-cache"],
+        }
+        # Warm the filesystem and bytecode caches before timing anything
+        time_command(cases["import converter + all backends"], 1, env)
+
+        results = {}
+        for name, cmd in cases.items():
+            durations = time_command(cmd, args.runs, env)
+            results[name] = {
+                "median_ms": round(statistics.median(durations), 2),
+                "min_ms": round(min(durations), 2),
+                "max_ms": round(max(durations), 2),
+            }
+        leaked = leaked_backends(env)
+
+    print(f"{'case':<34} {'median':>9} {'min':>9} {'max':>9}")
+    for name, stats in results.items():
+        print(f"{name:<34} {stats['median_ms']:>7.1f}ms {stats['min_ms']:>7.1f}ms {stats['max_ms']:>7.1f}ms")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"results": results, "leaked_backends": leaked}, indent=2),
+                                   encoding="utf-8")
+
+    failed = False
+    if leaked:
+        print(f"\nFAIL: backends imported at startup: {', '.join(leaked)}")
+        failed = True
+    median = results["import converter"]["median_ms"]
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"\nFAIL: import converter took {median:.1f}ms (limit {args.max_ms:.1f}ms)")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
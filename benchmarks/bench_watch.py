@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Benchmark watch-folder startup and rescans on a large inbox.
+
+Fills an inbox with many small text and Markdown files (spread over subfolders),
+converts them all once, then restarts the watcher on the unchanged inbox and
+reports how long the startup scan took and how many files it converted (it must
+be none). Finally it touches some files without changing them and edits a few
+others, and checks that only the edited ones are converted again.
+
+Usage:
+  python benchmarks/bench_watch.py [--files 100000] [--formats .html] [--jobs 0]
+                                   [--touched 1000] [--edited 100] [--output watch.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from watch import WatchFolder  # noqa: E402
+from corpus import DEFAULT_DIR, synthetic_text  # noqa: E402
+
+FILES_PER_FOLDER = 1000
+
+
+def fill_inbox(inbox: Path, files: int) -> list[Path]:
+    """Write ``files`` small documents, dated a minute ago so none look half-copied."""
+    text = synthetic_text(4096)
+    then = time.time() - 60
+    paths = []
+    for index in range(files):
+        folder = inbox / f"batch-{index // FILES_PER_FOLDER:04d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"doc-{index:06d}{'.md' if index % 2 else '.txt'}"
+        path.write_text(f"Document {index}\n\n{text[index % 2048:][:2048]}", encoding="utf-8")
+        os.utime(path, (then, then))
+        paths.append(path)
+    return paths
+
+
+def timed_pass(inbox: Path, out_dir: Path, formats: list[str], jobs: int) -> dict:
+    """Start a fresh watcher (as after a restart), run one pass and time it."""
+    start = time.perf_counter()
+    watcher = WatchFolder([inbox], formats, output_dir=out_dir, workers=jobs, settle=0)
+    loaded = time.perf_counter() - start
+    try:
+        stats = watcher.run_once()
+    finally:
+        watcher.close()
+    stats.update(seconds=round(time.perf_counter() - start, 3), manifest_load_seconds=round(loaded, 3))
+    return stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=100000, help="Documents in the inbox")
+    parser.add_argument("--formats", default=".html", help="Comma-separated output formats")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="Worker processes (0 = all cores)")
+    parser.add_argument("--touched", type=int, default=1000, help="Files touched but not changed")
+    parser.add_argument("--edited", type=int, default=100, help="Files whose content is changed")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    root = DEFAULT_DIR / f"watch-{args.files}"
+    shutil.rmtree(root, ignore_errors=True)
+    inbox, out_dir = root / "inbox", root / "out"
+    formats = args.formats.split(",")
+    print(f"Writing {args.files} files to {inbox}...")
+    paths = fill_inbox(inbox, args.files)
+
+    results = {}
+    results["initial"] = timed_pass(inbox, out_dir, formats, args.jobs)
+    results["restart"] = timed_pass(inbox, out_dir, formats, args.jobs)
+
+    now = time.time() - 30
+    for path in paths[:args.touched]:
+        os.utime(path, (now, now))
+    for path in paths[-args.edited:] if args.edited else []:
+        path.write_text(path.read_text(encoding="utf-8") + "\nEdited.\n", encoding="utf-8")
+        os.utime(path, (now, now))
+    results["after_changes"] = timed_pass(inbox, out_dir, formats, args.jobs)
+
+    print(f"\n{'pass':<14} {'seconds':>9} {'files':>8} {'up to date':>11} {'converted':>10} "
+          f"{'unchanged':>10} {'failed':>7}")
+    for name, stats in results.items():
+        print(f"{name:<14} {stats['seconds']:>9.2f} {stats['files']:>8} {stats['up_to_date']:>11} "
+              f"{stats['converted']:>10} {stats['unchanged']:>10} {stats['failed']:>7}")
+
+    ok = results["restart"]["converted"] == 0 and results["after_changes"]["converted"] == args.edited
+    print(f"\nRestart reconverted {results['restart']['converted']} file(s); after touching "
+          f"{args.touched} and editing {args.edited}, {results['after_changes']['converted']} were "
+          f"converted{'' if ok else ' (UNEXPECTED)'}")
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nResults written to {args.output}")
+    shutil.rmtree(root, ignore_errors=True)
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
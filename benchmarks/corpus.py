@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic benchmark corpus.
+
+Writes one document per readable format at each requested size, plus image-only
+("scanned") PDFs with varying page counts. Content is deterministic, so the same
+arguments always produce the same corpus and results stay comparable between runs.
+
+Usage:
+  python benchmarks/corpus.py [--out benchmarks/.corpus] [--sizes 1K,100K,1M] [--pages 1,5,20]
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+from typing import Optional
+
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from converter import DocumentConverter  # noqa: E402
+
+DEFAULT_DIR = Path(__file__).resolve().parent / ".corpus"
+DEFAULT_SIZES = "1K,100K,1M"
+DEFAULT_PAGES = "1,5,20"
+
+WORDS = (
+    "the quick brown fox jumps over lazy dog document convert format page text "
+    "report invoice contract summary appendix section table figure result value "
+    "analysis system process data output input review draft final approved"
+).split()
+
+UNITS = {"K": 1024, "M": 1024 * 1024, "G": 1024 * 1024 * 1024}
+
+
+def parse_size(label: str) -> int:
+    """Turn a label such as '100K' or '1M' into a byte count."""
+    label = label.strip().upper()
+    if label and label[-1] in UNITS:
+        return int(float(label[:-1]) * UNITS[label[-1]])
+    return int(label)
+
+
+def synthetic_text(size: int, seed: int = 0) -> str:
+    """Return roughly ``size`` bytes of paragraphs separated by blank lines."""
+    rng = random.Random(seed)
+    paragraphs = []
+    total = 0
+    while total < size:
+        sentences = []
+        for _ in range(rng.randint(2, 6)):
+            words = rng.choices(WORDS, k=rng.randint(6, 16))
+            sentences.append(" ".join(words).capitalize() + ".")
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        total += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:size]
+
+
+def write_markdown(path: Path, text: str) -> None:
+    paragraphs = text.split("\n\n")
+    lines = []
+    for index, paragraph in enumerate(paragraphs):
+        if index % 10 == 0:
+            lines.append(f"## Section {index // 10 + 1}")
+        lines.append(paragraph)
+    path.write_text("\n\n".join(lines), encoding="utf-8")
+
+
+def write_html(path: Path, text: str) -> None:
+    body = "\n".join(f"<p>{p}</p>" for p in text.split("\n\n"))
+    path.write_text(
+        "<!DOCTYPE html><html><head><title>Benchmark</title>"
+        "<style>p { margin: 0 }</style><script>var x = 1;</script></head>"
+        f"<body>\n{body}\n</body></html>",
+        encoding="utf-8",
+    )
+
+
+def write_scanned_pdf(path: Path, pages: int, seed: int = 0, font_size: Optional[int] = None) -> str:
+    """Render text onto blank page images and save them as an image-only PDF.
+
+    Returns the rendered text (one line per row, pages separated by blank lines)
+    so OCR output can be scored against it. ``font_size`` selects a scalable font
+    instead of Pillow's small bitmap default.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    font = ImageFont.load_default(size=font_size) if font_size else None
+    rows, spacing = (60, 32) if font is None else (2000 // (font_size * 2), font_size * 2)
+    images = []
+    page_texts = []
+    for _ in range(pages):
+        image = Image.new("L", (1700, 2200), 255)  # US letter at 200 DPI
+        draw = ImageDraw.Draw(image)
+        lines = []
+        for row in range(rows):
+            line = " ".join(rng.choices(WORDS, k=10 if font is None else 6))
+            draw.text((100, 100 + row * spacing), line, fill=0, font=font)
+            lines.append(line)
+        images.append(image)
+        page_texts.append("\n".join(lines))
+    images[0].save(path, "PDF", resolution=200, save_all=True, append_images=images[1:])
+    return "\n\n".join(page_texts)
+
+
+def generate_corpus(out_dir: Path, sizes: list[str], page_counts: list[int]) -> list[Path]:
+    """Create (or reuse) the corpus in ``out_dir`` and return every file in it."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    converter = DocumentConverter()
+    files = []
+
+    for label in sizes:
+        text = None
+        for fmt in sorted(DocumentConverter.SUPPORTED_READ_FORMATS):
+            path = out_dir / f"text-{label}{fmt}"
+            files.append(path)
+            if path.exists():
+                continue
+            if text is None:
+                text = synthetic_text(parse_size(label))
+            if fmt == ".md":
+                write_markdown(path, text)
+            elif fmt in (".html", ".htm"):
+                write_html(path, text)
+            else:
+                # Born-digital documents come straight from the converter's writers
+                converter._write_file(path, text, fmt)
+
+    for pages in page_counts:
+        path = out_dir / f"scan-{pages}p.pdf"
+        files.append(path)
+        if not path.exists():
+            write_scanned_pdf(path, pages)
+
+    return files
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", type=Path, default=DEFAULT_DIR, help="Corpus directory")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated text sizes")
+    parser.add_argument("--pages", default=DEFAULT_PAGES, help="Comma-separated scanned page counts")
+    args = parser.parse_args()
+
+    files = generate_corpus(args.out, args.sizes.split(","), [int(p) for p in args.pages.split(",")])
+    for path in files:
+        print(f"{path.stat().st_size:>12,}  {path.relative_to(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
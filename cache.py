@@ -0,0 +1,199 @@
+"""
+Conversion Cache
+Persistent, content-addressed stores of converted documents and OCR'd pages with LRU eviction.
+"""
+
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "file_converter"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_PAGE_CACHE_DIR = DEFAULT_CACHE_DIR / "pages"
+DEFAULT_PAGE_MAX_BYTES = 128 * 1024 * 1024
+
+
+class ConversionCache:
+    """Store converted outputs on disk keyed by a hash of the input and settings.
+
+    Entries are ordinary files whose modification time is bumped on every hit, so
+    evicting the oldest mtimes first gives least-recently-used eviction.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path, None] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None
+
+    @staticmethod
+    def hash_file(input_path: Path) -> str:
+        """Return the SHA-256 of a file's bytes."""
+        digest = hashlib.sha256()
+        with open(input_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        """Return the SHA-256 of an in-memory document."""
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def key_for(file_hash: str, input_format: str, output_format: str, tag: str) -> str:
+        """Combine an input hash with the source and target formats and converter tag.
+
+        The same bytes read as another format (e.g. HTML markup as ``.txt``) convert
+        differently, so the input format is part of the key.
+        """
+        digest = hashlib.sha256(f"{file_hash}\0{input_format}\0{output_format}\0{tag}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str, output_format: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}{output_format}"
+
+    def _entries(self):
+        return (p for p in self.cache_dir.glob("*/*") if p.is_file() and p.suffix != '.tmp')
+
+    def _entry_stats(self):
+        """Yield ``(stat, path)`` per entry, skipping any another process removes meanwhile.
+
+        Worker processes share the cache directory, so an entry listed a moment ago
+        may already have been evicted by one of them.
+        """
+        for path in self._entries():
+            try:
+                yield path.stat(), path
+            except FileNotFoundError:
+                continue
+
+    def get(self, key: str, output_format: str) -> Optional[Path]:
+        """Return the cached output for ``key`` (marking it recently used), or None."""
+        entry = self._entry_path(key, output_format)
+        try:
+            os.utime(entry)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, output_format: str, source: Union[Path, bytes]) -> None:
+        """Store a freshly converted file (or its bytes), then enforce the size cap."""
+        entry = self._entry_path(key, output_format)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_name = tempfile.mkstemp(dir=entry.parent, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                if isinstance(source, bytes):
+                    tmp.write(source)
+                else:
+                    with open(source, 'rb') as src:
+                        while chunk := src.read(1024 * 1024):
+                            tmp.write(chunk)
+            os.replace(tmp_name, entry)
+        except BaseException:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+        if self._size is not None:
+            try:
+                self._size += entry.stat().st_size
+            except FileNotFoundError:
+                pass  # already evicted by another process
+        self.evict()
+
+    def size(self) -> int:
+        """Total bytes currently held by the cache."""
+        self._size = sum(stat.st_size for stat, _ in self._entry_stats())
+        return self._size
+
+    def evict(self) -> int:
+        """Remove least-recently-used entries until the cache fits its cap."""
+        if self._size is None:
+            self.size()
+        if self._size <= self.max_bytes:
+            return 0
+
+        entries = sorted(self._entry_stats(), key=lambda e: e[0].st_mtime)
+        total = sum(stat.st_size for stat, _ in entries)
+        removed = 0
+        for stat, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+            removed += 1
+        self._size = total
+        return removed
+
+    def clear(self) -> int:
+        """Delete every cached entry and return how many were removed."""
+        removed = 0
+        for path in list(self._entries()):
+            path.unlink(missing_ok=True)
+            removed += 1
+        self._size = 0
+        return removed
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy."""
+        entries = sum(1 for _ in self._entries())
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': self.size(),
+            'max_bytes': self.max_bytes,
+        }
+
+
+class PageCache(ConversionCache):
+    """Checkpoint the OCR text of individual PDF pages as soon as each is recognised.
+
+    Pages are keyed by a hash of the rendered page image and the OCR settings, so
+    an interrupted job resumes where it stopped and a re-uploaded PDF with a few
+    edited pages only sends those pages back through Tesseract.
+    """
+
+    def __init__(self, cache_dir: Union[str, Path, None] = None,
+                 max_bytes: int = DEFAULT_PAGE_MAX_BYTES):
+        super().__init__(cache_dir or DEFAULT_PAGE_CACHE_DIR, max_bytes)
+
+    @staticmethod
+    def page_key(image, settings_tag: str) -> str:
+        """Identify a rendered page by its pixels and the settings it is OCR'd with."""
+        digest = hashlib.sha256(f"{image.mode}\0{image.size}\0{settings_tag}\0".encode('utf-8'))
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def get_text(self, key: str) -> Optional[str]:
+        """Return a checkpointed page's text, or None if it has not been OCR'd yet."""
+        entry = self.get(key, '.txt')
+        try:
+            return entry.read_text(encoding='utf-8') if entry is not None else None
+        except FileNotFoundError:
+            return None  # evicted by another process since the lookup
+
+    def put_text(self, key: str, text: str) -> None:
+        """Checkpoint one page's OCR text."""
+        self.put(key, '.txt', text.encode('utf-8'))
+
+    def prune(self, older_than_days: Optional[float] = None) -> int:
+        """Drop pages unused for ``older_than_days`` (if given), then enforce the size cap."""
+        removed = 0
+        if older_than_days is not None:
+            cutoff = time.time() - older_than_days * 24 * 3600
+            for stat, path in list(self._entry_stats()):
+                if stat.st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+                    removed += 1
+            self._size = None
+        return removed + self.evict()
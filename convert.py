@@ -4,10 +4,17 @@ File Converter CLI
 Convert documents between txt, docx, and pdf formats.
 """
 
+import os
 import sys
 import argparse
+from contextlib import ExitStack
 from pathlib import Path
+from typing import List
 from converter import DocumentConverter
+from cache import ConversionCache, PageCache, DEFAULT_MAX_BYTES
+from ocr import COLOR_MODES, PROFILES, resolve_settings
+from pdfwriter import PDF_LAYOUTS, resolve_font
+from sandbox import ResourceLimits
 
 
 def print_help():
@@ -23,7 +30,7 @@ def print_help():
 ║  SUPPORTED INPUT FORMATS:                                    ║
 ║    • .txt   - Plain text files                               ║
 ║    • .docx  - Microsoft Word documents                       ║
-║    • .pdf   - PDF files (extracted via OCR)                  ║
+║    • .pdf   - PDF files (text layer, OCR fallback)           ║
 ║    • .rtf   - Rich Text Format                               ║
 ║    • .odt   - OpenDocument Text                              ║
 ║    • .html  - HTML documents                                 ║
@@ -40,58 +47,405 @@ def print_help():
 ║                                                              ║
 ║  USAGE:                                                      ║
 ║    python convert.py <input_file> <output_format>            ║
+║    python convert.py <inputs...> <output_format>  (batch)    ║
+║    python convert.py <folders...> <output_format> --watch    ║
+║    python convert.py - <output_format> --from <format>       ║
 ║                                                              ║
 ║  EXAMPLES:                                                   ║
 ║    python convert.py document.pdf .txt                       ║
 ║    python convert.py notes.txt .docx                         ║
 ║    python convert.py report.docx .pdf                        ║
 ║    python convert.py webpage.html .md                        ║
+║    python convert.py scan.pdf .txt,.html,.pdf                ║
+║    python convert.py scan.pdf .txt --jobs 4                  ║
+║    python convert.py scan.pdf .txt --ocr-profile fast        ║
+║    python convert.py inbox/ "*.docx" .pdf --jobs 8           ║
+║    python convert.py notes.md .txt --output notes.txt        ║
+║    cat page.html | python convert.py - .md --from .html      ║
+║                                                              ║
+║  OPTIONS:                                                    ║
+║    -j, --jobs N       Worker processes (0 = all cores); OCR  ║
+║                       pages, or files in batch mode          ║
+║    -o, --output PATH  Output folder, file, or - for stdout   ║
+║    --from FMT         Input format when reading stdin (-)    ║
+║    --watch            Keep converting new or changed files   ║
+║                       in the given folders                   ║
+║    --interval S       Seconds between --watch rescans        ║
+║    --once             One --watch pass for what changed      ║
+║    --manifest PATH    --watch record of converted files      ║
+║    --summary PATH     Batch summary JSON (text copy is .txt) ║
+║    --cpu-limit S      Stop a conversion after S CPU seconds  ║
+║    --time-limit S     Stop a conversion after S seconds      ║
+║    --memory-limit MB  Stop a conversion above MB of memory   ║
+║                       (each file then runs in a sandbox)     ║
+║    --parallel-writers Render several output formats at once  ║
+║    --profile          Show per-stage timings and memory use  ║
+║    --page-window N    Rasterize N PDF pages at a time and    ║
+║                       report peak memory                     ║
+║    --force-ocr        OCR every PDF page, ignoring any       ║
+║                       embedded text layer                    ║
+║    --ocr-profile P    fast, balanced or accurate OCR         ║
+║    --dpi N            Rasterize scanned pages at N DPI       ║
+║    --ocr-color MODE   rgb, gray or binary page images        ║
+║    --psm N, --oem N   Tesseract page segmentation / engine   ║
+║    --raster-threads N pdf2image threads per document         ║
+║    --pdftocairo       Rasterize with pdftocairo              ║
+║    --omp-threads N    OpenMP threads per Tesseract run       ║
+║    --pdf-font PATH    TTF font to embed in PDF output for    ║
+║                       Unicode text (auto = a system font)    ║
+║    --pdf-layout L     bulk (default) or lines PDF layout     ║
+║    --no-cache         Bypass the cache and page checkpoints  ║
+║    --clear-cache      Empty the cache and page checkpoints   ║
+║    --checkpoints      Show checkpointed OCR pages            ║
+║    --prune-checkpoints DAYS                                  ║
+║                       Drop page checkpoints unused for DAYS  ║
+║    --cache-size MB    Cache size cap (default: 512)          ║
 ║                                                              ║
 ║  OUTPUT:                                                     ║
 ║    Files are saved to: ~/Desktop/Converted Documents/        ║
+║    (or the --output folder)                                  ║
+║    Repeat conversions are cached in ~/.cache/file_converter/ ║
+║    OCR'd pages are checkpointed, so interrupted jobs resume, ║
+║    in ~/.cache/file_converter/pages/                         ║
 ╚══════════════════════════════════════════════════════════════╝
 """)
 
 
+def run_single(input_file: str, output_formats: List[str], args, cache, page_cache) -> None:
+    """Convert one file to each output format, reporting progress on the console."""
+    # Validate input file exists
+    input_path = Path(input_file)
+    if not input_path.exists():
+        print(f"\n❌ Error: File not found: {input_file}\n")
+        sys.exit(1)
+    
+    # Perform conversion
+    try:
+        converter = DocumentConverter(workers=args.jobs if args.jobs is not None else 1,
+                                      page_window=args.page_window,
+                                      force_ocr=args.force_ocr, cache=cache,
+                                      ocr_settings=args.ocr_settings, page_cache=page_cache,
+                                      pdf_font=args.pdf_font, pdf_layout=args.pdf_layout,
+                                      output_dir=args.output_dir)
+        print(f"\n⏳ Converting {input_path.name}...")
+        result = converter.convert_with_metrics(input_file, output_formats,
+                                                parallel=args.parallel_writers)
+        output_paths = result.output_paths
+        saved = "\n   ".join(output_paths)
+        print(f"✅ Success! {'File' if len(output_paths) == 1 else 'Files'} saved to:\n   {saved}\n")
+        if cache is not None and cache.hits:
+            print(f"♻️  {cache.hits} of {len(output_paths)} output(s) served from cache "
+                  f"(use --no-cache to convert again)\n")
+        if input_path.suffix.lower() == '.pdf' and (cache is None or cache.misses):
+            methods = converter.ocr.page_methods
+            print(f"📑 Pages: {methods.count('text')} from text layer, "
+                  f"{methods.count('ocr')} via OCR\n")
+            if converter.ocr.checkpoint_hits:
+                print(f"⏩ Resumed: {converter.ocr.checkpoint_hits} OCR'd page(s) reused from "
+                      f"checkpoints\n")
+            if args.page_window:
+                print(f"📈 Peak OCR memory: {converter.ocr.peak_rss / (1024 * 1024):.1f} MB\n")
+        if args.profile:
+            print("📊 Profile:")
+            print(result.format())
+            print()
+    except ValueError as e:
+        print(f"\n❌ Error: {e}\n")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Conversion failed: {e}\n")
+        sys.exit(1)
+
+
+def run_batch_mode(inputs: List[str], output_formats: List[str], args, cache, page_cache) -> None:
+    """Convert many files on a worker pool and write a summary."""
+    from batch import collect_inputs, run_batch, format_summary, write_summary
+    
+    jobs = collect_inputs(inputs)
+    if not jobs:
+        print("\n❌ Error: No convertible files matched the given inputs.\n")
+        sys.exit(1)
+    
+    options = {'page_window': args.page_window, 'force_ocr': args.force_ocr, 'cache': cache,
+               'ocr_settings': args.ocr_settings, 'page_cache': page_cache,
+               'pdf_font': args.pdf_font, 'pdf_layout': args.pdf_layout, 'output_dir': args.output_dir}
+    print(f"\n⏳ Converting {len(jobs)} file(s) to {', '.join(output_formats)}...")
+    
+    def report(result, done, total):
+        icon = "✅" if result['status'] == 'ok' else "❌"
+        detail = result['error'] if result['status'] != 'ok' else f"{result['seconds']:.2f}s"
+        print(f"   [{done}/{total}] {icon} {Path(result['input']).name} ({detail})")
+    
+    try:
+        summary = run_batch(jobs, output_formats, workers=args.jobs if args.jobs is not None else 0,
+                            converter_options=options, progress=report, limits=args.limits)
+    except ValueError as e:
+        print(f"\n❌ Error: {e}\n")
+        sys.exit(1)
+    
+    summary_path = Path(args.summary) if args.summary else \
+        (args.output_dir or DocumentConverter.DEFAULT_OUTPUT_DIR) / "batch-summary.json"
+    text_path = write_summary(summary, summary_path)
+    print()
+    print(format_summary(summary))
+    print(f"📝 Summary written to:\n   {summary_path}\n   {text_path}\n")
+    if args.profile:
+        print("📊 Time per stage across all files:")
+        totals = {}
+        for file_result in summary['files']:
+            for stage, seconds in (file_result.get('metrics') or {}).get('stages', {}).items():
+                totals[stage] = totals.get(stage, 0.0) + seconds
+        for stage, seconds in totals.items():
+            indent = "  " * stage.count(".")
+            print(f"   {indent + stage:<22} {seconds:>10.3f}s")
+        print()
+    if summary['failed']:
+        sys.exit(1)
+
+
+def run_pipe(inputs: List[str], output_formats: List[str], args, cache, page_cache) -> None:
+    """Convert one input to one output, either of which may be stdin/stdout ("-").
+    
+    Nothing but the converted document is written to stdout, so this can sit in
+    the middle of a shell pipeline; errors go to stderr.
+    """
+    def fail(message: str) -> None:
+        print(f"\n❌ Error: {message}\n", file=sys.stderr)
+        sys.exit(1)
+    
+    if len(inputs) != 1 or len(output_formats) != 1:
+        fail("Piping and --output FILE take one input and one output format")
+    input_file, output_format = inputs[0], output_formats[0]
+    output = args.output or '-'
+    if input_file == '-':
+        if not args.input_format:
+            fail("Reading from stdin needs the input format, e.g. --from .txt")
+    elif not Path(input_file).is_file():
+        fail(f"File not found: {input_file}")
+    input_format = args.input_format or Path(input_file).suffix
+    
+    converter = DocumentConverter(workers=args.jobs if args.jobs is not None else 1,
+                                  page_window=args.page_window,
+                                  force_ocr=args.force_ocr, cache=cache,
+                                  ocr_settings=args.ocr_settings, page_cache=page_cache,
+                                  pdf_font=args.pdf_font, pdf_layout=args.pdf_layout)
+    staged = None
+    try:
+        with ExitStack() as stack:
+            source = sys.stdin.buffer if input_file == '-' else stack.enter_context(open(input_file, 'rb'))
+            if output == '-':
+                target = sys.stdout.buffer
+            else:
+                # The document goes to a hidden file beside the output, renamed over it only
+                # once the conversion succeeds: a failure (or writing onto the input itself)
+                # never leaves the output truncated or half-written
+                output_path = Path(output)
+                staged = output_path.with_name(f".{output_path.name}.{os.getpid()}.tmp")
+                target = stack.enter_context(open(staged, 'wb'))
+            result = converter.convert_stream(source, input_format, target, output_format)
+            target.flush()
+        if staged is not None:
+            os.replace(staged, output)
+            staged = None
+    except BrokenPipeError:
+        # Whatever reads stdout stopped early (e.g. `| head`); exit quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    except (ValueError, OSError) as e:
+        fail(str(e))
+    except Exception as e:
+        print(f"\n❌ Conversion failed: {e}\n", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if staged is not None:
+            staged.unlink(missing_ok=True)
+    if args.profile:
+        print(f"📊 Profile:\n{result.format()}\n", file=sys.stderr)
+
+
+def run_watch_mode(folders: List[str], output_formats: List[str], args, cache, page_cache) -> None:
+    """Keep converting new and changed files in the watched folders until interrupted."""
+    from watch import WatchFolder
+    
+    options = {'page_window': args.page_window, 'force_ocr': args.force_ocr, 'cache': cache,
+               'ocr_settings': args.ocr_settings, 'page_cache': page_cache,
+               'pdf_font': args.pdf_font, 'pdf_layout': args.pdf_layout}
+    
+    def report(result):
+        icon = {"ok": "✅", "unchanged": "⏭️", "failed": "❌"}[result['status']]
+        detail = result['error'] if result['status'] == 'failed' else result['status']
+        print(f"   {icon} {result['input']} ({detail})")
+    
+    try:
+        watcher = WatchFolder(folders, output_formats, output_dir=args.output_dir,
+                              manifest_path=Path(args.manifest) if args.manifest else None,
+                              workers=args.jobs if args.jobs is not None else 0,
+                              converter_options=options, progress=report, limits=args.limits)
+    except ValueError as e:
+        print(f"\n❌ Error: {e}\n")
+        sys.exit(1)
+    
+    print(f"\n👀 Watching {', '.join(folders)} for {', '.join(watcher.output_formats)} "
+          f"({len(watcher.manifest)} file(s) in {watcher.manifest.path})")
+    try:
+        if args.once:
+            stats = watcher.run_once()
+            print(f"\n📋 {stats['files']} file(s): {stats['up_to_date']} up to date, "
+                  f"{stats['converted']} converted, {stats['unchanged']} unchanged, "
+                  f"{stats['failed']} failed, {stats['settling']} still being written\n")
+        else:
+            watcher.run(interval=args.interval)
+    except KeyboardInterrupt:
+        print("\n👋 Stopping after the running conversions")
+    finally:
+        watcher.close()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Convert documents between txt, docx, and pdf formats.",
         add_help=False
     )
-    parser.add_argument("input_file", nargs="?", help="Path to the input file")
-    parser.add_argument("output_format", nargs="?", help="Desired output format (e.g., .txt, .docx)")
+    parser.add_argument("paths", nargs="*",
+                        help="Input file(s), directories or globs followed by the output "
+                             "format(s), comma-separated")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Worker processes (0 = all cores): OCR pages for one file, "
+                             "files in batch mode")
+    parser.add_argument("--page-window", type=int, default=None, metavar="N",
+                        help="Rasterize at most N PDF pages at a time to bound memory")
+    parser.add_argument("--force-ocr", action="store_true",
+                        help="OCR every PDF page even if it has an embedded text layer")
+    parser.add_argument("--ocr-profile", choices=sorted(PROFILES), default=None,
+                        help="Preset OCR speed/accuracy trade-off; the options below override it")
+    parser.add_argument("--dpi", type=int, default=None, help="Rasterization resolution for OCR")
+    parser.add_argument("--ocr-color", choices=COLOR_MODES, default=None,
+                        help="Rasterize pages in colour, greyscale or black and white")
+    parser.add_argument("--psm", type=int, default=None, help="Tesseract page segmentation mode")
+    parser.add_argument("--oem", type=int, default=None, help="Tesseract OCR engine mode")
+    parser.add_argument("--raster-threads", type=int, default=None, metavar="N",
+                        help="pdf2image threads used to rasterize a document")
+    parser.add_argument("--pdftocairo", action="store_true", default=None,
+                        help="Rasterize with pdftocairo instead of pdftoppm")
+    parser.add_argument("--omp-threads", type=int, default=None, metavar="N",
+                        help="OpenMP threads each Tesseract run may use")
+    parser.add_argument("--pdf-font", default=None, metavar="PATH",
+                        help="TTF font embedded in PDF output so any Unicode text renders "
+                             "('auto' picks an installed system font)")
+    parser.add_argument("--pdf-layout", choices=PDF_LAYOUTS, default="bulk",
+                        help="Wrap whole paragraphs at once (bulk) or leave it to fpdf2 per line")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Convert from scratch without reading or updating the cache "
+                             "or OCR page checkpoints")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="Remove every entry from the conversion cache and page checkpoints")
+    parser.add_argument("--checkpoints", action="store_true",
+                        help="Show how many OCR'd pages are checkpointed and their size")
+    parser.add_argument("--prune-checkpoints", type=float, default=None, metavar="DAYS",
+                        help="Delete OCR page checkpoints unused for DAYS days")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024),
+                        metavar="MB", help="Maximum size of the conversion cache in MB")
+    parser.add_argument("-o", "--output", metavar="PATH",
+                        help="Output folder, output file, or - for stdout (default: "
+                             "~/Desktop/Converted Documents)")
+    parser.add_argument("--from", dest="input_format", metavar="FORMAT",
+                        help="Format of the input when reading stdin (-), e.g. .txt")
+    parser.add_argument("--watch", action="store_true",
+                        help="Watch the input folders and convert new or changed files")
+    parser.add_argument("--interval", type=float, default=2.0, metavar="SECONDS",
+                        help="How often --watch rescans the folders")
+    parser.add_argument("--once", action="store_true",
+                        help="With --watch, convert what changed since the last run and exit")
+    parser.add_argument("--manifest", metavar="PATH",
+                        help="Where --watch keeps its record of converted files")
+    parser.add_argument("--summary", metavar="PATH",
+                        help="Where to write the batch summary JSON")
+    parser.add_argument("--cpu-limit", type=float, default=None, metavar="SECONDS",
+                        help="CPU time one file may use before its worker is killed")
+    parser.add_argument("--time-limit", type=float, default=None, metavar="SECONDS",
+                        help="Wall time one file may take before its worker is killed")
+    parser.add_argument("--memory-limit", type=float, default=None, metavar="MB",
+                        help="Memory one file may use before its worker is killed")
+    parser.add_argument("--parallel-writers", action="store_true",
+                        help="Write multiple output formats in parallel processes")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print per-stage timings, sizes and peak memory")
     parser.add_argument("-h", "--help", action="store_true", help="Show help message")
     
     args = parser.parse_args()
     
+    try:
+        args.ocr_settings = resolve_settings(
+            args.ocr_profile, dpi=args.dpi, color=args.ocr_color, psm=args.psm, oem=args.oem,
+            thread_count=args.raster_threads, use_pdftocairo=args.pdftocairo,
+            omp_threads=args.omp_threads,
+        )
+        args.pdf_font = resolve_font(args.pdf_font)
+        env_limits = ResourceLimits.from_env()
+        args.limits = ResourceLimits(
+            args.cpu_limit if args.cpu_limit is not None else env_limits.cpu_seconds,
+            args.time_limit if args.time_limit is not None else env_limits.wall_seconds,
+            args.memory_limit if args.memory_limit is not None else env_limits.memory_mb,
+        )
+    except ValueError as e:
+        print(f"\n❌ Error: {e}\n")
+        sys.exit(1)
+    
+    maintenance = args.clear_cache or args.checkpoints or args.prune_checkpoints is not None
+    cache = page_cache = None
+    if maintenance or not args.no_cache:
+        cache = ConversionCache(max_bytes=args.cache_size * 1024 * 1024)
+        page_cache = PageCache()
+    
+    if args.clear_cache:
+        removed = cache.clear()
+        pages = page_cache.clear()
+        print(f"\n🧹 Cleared {removed} cached conversion(s) and {pages} OCR page checkpoint(s) "
+              f"from {cache.cache_dir}\n")
+    if args.prune_checkpoints is not None:
+        removed = page_cache.prune(args.prune_checkpoints)
+        print(f"\n✂️  Pruned {removed} OCR page checkpoint(s) unused for "
+              f"{args.prune_checkpoints:g} day(s)\n")
+    if args.checkpoints:
+        stats = page_cache.stats()
+        print(f"\n📦 OCR page checkpoints in {page_cache.cache_dir}:\n"
+              f"   {stats['entries']} page(s), {stats['bytes'] / (1024 * 1024):.1f} MB "
+              f"of {stats['max_bytes'] / (1024 * 1024):.0f} MB\n")
+    if maintenance:
+        if not args.paths:
+            sys.exit(0)
+        if args.no_cache:
+            cache = page_cache = None
+    
     # Show help if requested or no arguments provided
-    if args.help or not args.input_file:
+    if args.help or not args.paths:
         print_help()
         sys.exit(0)
     
-    if not args.output_format:
+    if len(args.paths) < 2:
         print("\n❌ Error: Please specify an output format.")
         print("   Example: python convert.py document.pdf .txt\n")
         sys.exit(1)
     
-    # Validate input file exists
-    input_path = Path(args.input_file)
-    if not input_path.exists():
-        print(f"\n❌ Error: File not found: {args.input_file}\n")
-        sys.exit(1)
-    
-    # Perform conversion
-    try:
-        converter = DocumentConverter()
-        print(f"\n⏳ Converting {input_path.name}...")
-        output_path = converter.convert(args.input_file, args.output_format)
-        print(f"✅ Success! File saved to:\n   {output_path}\n")
-    except ValueError as e:
-        print(f"\n❌ Error: {e}\n")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n❌ Conversion failed: {e}\n")
-        sys.exit(1)
+    # The output format may be a comma-separated list, e.g. .txt,.html,.pdf
+    inputs = args.paths[:-1]
+    output_formats = [fmt for fmt in args.paths[-1].split(',') if fmt.strip()]
+    # An existing folder (or a path ending in a separator) is an output folder,
+    # anything else a single output file
+    args.output_dir = None
+    if args.output and args.output != '-' and (Path(args.output).is_dir()
+                                               or args.output.endswith(('/', os.sep))):
+        args.output_dir = Path(args.output)
+    if args.watch:
+        run_watch_mode(inputs, output_formats, args, cache, page_cache)
+    elif inputs == ['-'] or (args.output is not None and args.output_dir is None):
+        run_pipe(inputs, output_formats, args, cache, page_cache)
+    elif (len(inputs) == 1 and not Path(inputs[0]).is_dir() and not set("*?[") & set(inputs[0])
+          and not args.limits):
+        # With resource limits even a single file runs in a sandboxed worker
+        run_single(inputs[0], output_formats, args, cache, page_cache)
+    else:
+        run_batch_mode(inputs, output_formats, args, cache, page_cache)
 
 
 if __name__ == "__main__":
@@ -1,174 +1,832 @@
+import errno
+import io
 import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import warnings
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from typing import Optional
-from docx import Document as DocxDocument
-from pdf2image import convert_from_path
-from PIL import Image
-import pytesseract
-from fpdf import FPDF
-from odf.opendocument import OpenDocumentText, load as load_odt
-from odf.text import P as OdfParagraph
-from odf import text as odf_text
-from striprtf.striprtf import rtf_to_text
-from bs4 import BeautifulSoup
-import markdown
-
-try:
-    pass
-except ImportError:
-    print("Install required packages: pip install -r requirements.txt")
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+from ocr import OCREngine, OCRSettings
+from cache import ConversionCache, PageCache
+from metrics import ConversionResult
+from pdfwriter import PDF_LAYOUTS, resolve_font, write_text_pdf
+
+# Format backends (python-docx, fpdf2, odfpy, striprtf, BeautifulSoup, pdf2image,
+# pytesseract) are imported inside the reader/writer that needs them, so only the
+# formats actually used in a run pay their import cost.
+
+__version__ = "2.0"
+
+# A registry entry is either the name of a DocumentConverter method or a plugin
+# function taking the converter as its first argument
+Reader = Union[str, Callable[..., str]]
+Writer = Union[str, Callable[..., None]]
+
+# Readers take a file path or an in-memory binary buffer, writers a path or a
+# writable binary stream
+Source = Union[Path, BinaryIO]
+Target = Union[Path, BinaryIO]
+
+# Streaming readers yield a document line by line and streaming writers consume
+# those lines, so line-oriented conversions never hold the whole document
+StreamReader = Union[str, Callable[..., Iterator[str]]]
+StreamWriter = Union[str, Callable[..., None]]
+
+
+def _as_source(source: Union[Path, bytes]) -> Source:
+    """Return a readable source for a file path or an in-memory document."""
+    return source if isinstance(source, Path) else io.BytesIO(source)
+
+
+def _source_text(source: Source, errors: str = 'strict') -> str:
+    """Decode a UTF-8 source with the same newline handling as ``Path.read_text``."""
+    if isinstance(source, Path):
+        return source.read_text(encoding='utf-8', errors=errors)
+    wrapper = io.TextIOWrapper(source, encoding='utf-8', errors=errors)
+    try:
+        return wrapper.read()
+    finally:
+        wrapper.detach()
+
+
+def _source_lines(source: Source, errors: str = 'strict') -> Iterator[str]:
+    """Yield the lines ``_source_text(source).split('\\n')`` would give, one at a time."""
+    if isinstance(source, Path):
+        stream = open(source, encoding='utf-8', errors=errors)
+    else:
+        stream = io.TextIOWrapper(source, encoding='utf-8', errors=errors)
+    try:
+        ended = True
+        for line in stream:
+            ended = line.endswith('\n')
+            yield line[:-1] if ended else line
+        if ended:
+            yield ''  # text after the final newline (or an empty file) is one empty line
+    finally:
+        if isinstance(source, Path):
+            stream.close()
+        else:
+            stream.detach()
+
+
+def _paragraph_lines(paragraphs: Iterable[str]) -> Iterator[str]:
+    """Yield the lines ``'\\n'.join(paragraphs).split('\\n')`` would give, one at a time."""
+    empty = True
+    for paragraph in paragraphs:
+        empty = False
+        yield from _iter_lines(paragraph)
+    if empty:
+        yield ''
+
+
+def _iter_lines(content: str) -> Iterator[str]:
+    """Yield the lines of ``content`` like ``content.split('\\n')`` without building a list."""
+    start = 0
+    while True:
+        end = content.find('\n', start)
+        if end == -1:
+            yield content[start:]
+            return
+        yield content[start:end]
+        start = end + 1
+
+
+@contextmanager
+def _text_target(target: Target) -> Iterator[TextIO]:
+    """Open a path or wrap a binary stream for buffered UTF-8 text output."""
+    if isinstance(target, Path):
+        with open(target, 'w', encoding='utf-8', newline='') as stream:
+            yield stream
+        return
+    wrapper = io.TextIOWrapper(target, encoding='utf-8', newline='')
+    try:
+        yield wrapper
+        wrapper.flush()
+    finally:
+        wrapper.detach()
+
+
+def _write_target(target: Target, data: bytes) -> None:
+    """Write encoded output to a file path or a binary stream."""
+    if isinstance(target, Path):
+        target.write_bytes(data)
+    else:
+        target.write(data)
+
+
+COPY_CHUNK = 1024 * 1024
+
+
+def _copy_bytes(source: Source, target: Target) -> int:
+    """Copy ``source`` to ``target`` unchanged and return the number of bytes copied.
+    
+    Files are copied by the kernel (``copy_file_range``/``sendfile`` on Linux,
+    ``fcopyfile`` on macOS, ``splice`` when either side is a pipe), so the data never
+    passes through Python; in-memory buffers are copied in chunks.
+    """
+    if isinstance(source, Path) and isinstance(target, Path):
+        shutil.copyfile(source, target)
+        return target.stat().st_size
+    if isinstance(source, Path):
+        with open(source, 'rb') as stream:
+            return _copy_bytes(stream, target)
+    if isinstance(target, Path):
+        with open(target, 'wb') as stream:
+            return _copy_bytes(source, stream)
+    try:
+        source_fd, target_fd = source.fileno(), target.fileno()
+    except (AttributeError, io.UnsupportedOperation):
+        source_fd = target_fd = None
+    if source_fd is not None:
+        target.flush()
+        copied = _kernel_copy(source_fd, target_fd)
+        if copied is not None:
+            return copied
+    copied = 0
+    for chunk in iter(lambda: source.read(COPY_CHUNK), b''):
+        target.write(chunk)
+        copied += len(chunk)
+    return copied
+
+
+def _kernel_copy(source_fd: int, target_fd: int) -> Optional[int]:
+    """Copy the rest of ``source_fd`` to ``target_fd`` in the kernel.
+    
+    Returns None, having copied nothing, if the platform or the kind of file
+    (a terminal, say) doesn't allow it.
+    """
+    pipe = any(stat.S_ISFIFO(os.fstat(fd).st_mode) for fd in (source_fd, target_fd))
+    if pipe and hasattr(os, 'splice'):
+        copy = partial(os.splice, source_fd, target_fd, COPY_CHUNK)
+    elif sys.platform.startswith('linux') and hasattr(os, 'sendfile'):
+        # Elsewhere sendfile only writes to sockets
+        copy = partial(os.sendfile, target_fd, source_fd, None, COPY_CHUNK)
+    else:
+        return None
+    copied = 0
+    while True:
+        try:
+            sent = copy()
+        except OSError as e:
+            if copied == 0 and e.errno in (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK,
+                                           errno.EOPNOTSUPP, errno.ESPIPE):
+                return None
+            raise
+        if sent == 0:
+            return copied
+        copied += sent
+
+
+def _backend_target(target: Target) -> Union[str, BinaryIO]:
+    """Return what path-or-stream backends (odfpy, fpdf2) expect for ``target``."""
+    return str(target) if isinstance(target, Path) else target
 
 
 class DocumentConverter:
     """Convert between various document formats."""
     
-    SUPPORTED_READ_FORMATS = {'.txt', '.docx', '.pdf', '.rtf', '.odt', '.html', '.htm', '.md'}
-    SUPPORTED_WRITE_FORMATS = {'.txt', '.docx', '.pdf', '.rtf', '.odt', '.html', '.md'}
+    READERS: Dict[str, Reader] = {
+        '.txt': '_read_text',
+        '.docx': '_read_docx',
+        '.pdf': '_extract_pdf_text',
+        '.rtf': '_read_rtf',
+        '.odt': '_read_odt',
+        '.html': '_read_html',
+        '.htm': '_read_html',
+        '.md': '_read_text',
+    }
+    WRITERS: Dict[str, Writer] = {
+        '.txt': '_write_text',
+        '.docx': '_write_docx',
+        '.pdf': '_write_pdf',
+        '.rtf': '_write_rtf',
+        '.odt': '_write_odt',
+        '.html': '_write_html',
+        '.md': '_write_text',
+    }
+    STREAM_READERS: Dict[str, StreamReader] = {
+        '.txt': '_iter_text',
+        '.docx': '_iter_docx',
+        '.odt': '_iter_odt',
+        '.html': '_iter_html',
+        '.htm': '_iter_html',
+        '.md': '_iter_text',
+    }
+    STREAM_WRITERS: Dict[str, StreamWriter] = {
+        '.txt': '_stream_text',
+        '.md': '_stream_text',
+        '.html': '_stream_html',
+        '.rtf': '_stream_rtf',
+        '.pdf': '_stream_pdf',
+    }
+    SUPPORTED_READ_FORMATS = set(READERS)
+    SUPPORTED_WRITE_FORMATS = set(WRITERS)
     SUPPORTED_FORMATS = SUPPORTED_READ_FORMATS | SUPPORTED_WRITE_FORMATS
+    DEFAULT_OUTPUT_DIR = Path.home() / "Desktop" / "Converted Documents"
     
-    def __init__(self):
-        self.output_dir = Path.home() / "Desktop" / "Converted Documents"
-        self.output_dir.mkdir(parents=True, exist_ok=True)
+    def __init__(self, workers: int = 1, page_window: Optional[int] = None,
+                 force_ocr: bool = False, cache: Optional[ConversionCache] = None,
+                 ocr_settings: Union[str, OCRSettings, None] = None,
+                 page_cache: Optional[PageCache] = None,
+                 pdf_font: Union[str, Path, None] = None, pdf_layout: str = "bulk",
+                 output_dir: Union[str, Path, None] = None):
+        """Create a converter.
+
+        ``workers`` sets the OCR process count (0 = all cores), ``page_window``
+        limits how many PDF pages are rasterized at once (None = whole document)
+        and ``force_ocr`` ignores any embedded PDF text layer. Pass a
+        ``ConversionCache`` to reuse earlier outputs for identical inputs.
+        ``ocr_settings`` is an ``OCRSettings`` or a profile name such as ``"fast"``,
+        and a ``PageCache`` checkpoints OCR'd pages so interrupted jobs resume.
+        ``pdf_font`` is a TTF font file (or ``"auto"``) to embed in PDF output for
+        full Unicode text, and ``pdf_layout`` is ``"bulk"`` or the slower ``"lines"``.
+        Outputs go to ``output_dir`` (default: ``DEFAULT_OUTPUT_DIR``).
+        """
+        if pdf_layout not in PDF_LAYOUTS:
+            raise ValueError(f"Unknown PDF layout: {pdf_layout} (expected one of {', '.join(PDF_LAYOUTS)})")
+        self.output_dir = Path(output_dir) if output_dir else self.DEFAULT_OUTPUT_DIR
+        self.ocr = OCREngine(workers=workers, page_window=page_window,
+                             text_layer=not force_ocr, settings=ocr_settings,
+                             page_cache=page_cache)
+        self.cache = cache
+        self.pdf_font = resolve_font(pdf_font)
+        self.pdf_layout = pdf_layout
+        self.metrics_callbacks: List[Callable[[ConversionResult], None]] = []
+        self.last_result: Optional[ConversionResult] = None
+    
+    def __getstate__(self) -> dict:
+        """Leave callbacks behind when the converter is pickled into a worker process."""
+        state = self.__dict__.copy()
+        state['metrics_callbacks'] = []
+        state['last_result'] = None
+        return state
     
     def convert(self, input_path: str, output_format: str) -> Optional[str]:
         """Convert a document to the specified format."""
+        return self.convert_many(input_path, [output_format])[0]
+    
+    def convert_many(self, input_path: str, output_formats: Iterable[str],
+                     parallel: bool = False, output_stem: Optional[str] = None) -> List[str]:
+        """Convert a document to several formats, reading the input only once.
+        
+        The input is parsed into a single in-memory document which every requested
+        writer then renders. When the input and every output are line-oriented
+        (see ``STREAM_READERS``/``STREAM_WRITERS``) lines are instead streamed from
+        reader to writer, re-reading the input per format, so memory stays flat for
+        any file size. Formats with identical content (.txt and .md) are copied
+        byte for byte. With ``parallel`` the writers run in separate processes.
+        Outputs are named after the input unless ``output_stem`` gives another
+        name. Returns the output paths in the order the formats were given.
+        """
+        return self.convert_with_metrics(input_path, output_formats, parallel, output_stem).output_paths
+    
+    def add_metrics_callback(self, callback: Callable[[ConversionResult], None]) -> None:
+        """Call ``callback(result)`` after every conversion, successful or not."""
+        self.metrics_callbacks.append(callback)
+    
+    def convert_with_metrics(self, input_path: str, output_formats: Union[str, Iterable[str]],
+                             parallel: bool = False, output_stem: Optional[str] = None) -> ConversionResult:
+        """Convert like ``convert_many`` and return a ``ConversionResult``.
+        
+        The result carries the output paths along with per-stage timings, bytes
+        in/out, page counts and peak memory. It is also kept as ``last_result`` and
+        passed to every registered metrics callback.
+        """
+        if isinstance(output_formats, str):
+            output_formats = [output_formats]
         input_file = Path(input_path)
         
         if not input_file.exists():
             raise FileNotFoundError(f"File not found: {input_path}")
         
         input_format = input_file.suffix.lower()
-        output_format = output_format.lower()
-        
-        if not output_format.startswith('.'):
-            output_format = f'.{output_format}'
-        
         if input_format not in self.SUPPORTED_READ_FORMATS:
             raise ValueError(f"Cannot read format: {input_format}")
         
-        if output_format not in self.SUPPORTED_WRITE_FORMATS:
-            raise ValueError(f"Cannot write format: {output_format}")
+        formats = self.resolve_output_formats(output_formats)
         
-        # Read content based on input format
-        content = self._read_file(input_file, input_format)
+        result = ConversionResult(str(input_file), input_format, formats,
+                                  bytes_in=input_file.stat().st_size)
+        self._measure(result, lambda: self._convert(input_file, input_format, formats,
+                                                    parallel, result, output_stem))
+        return result
+    
+    def convert_bytes(self, data: bytes, input_format: str, output_format: str,
+                      save_as: Optional[str] = None) -> bytes:
+        """Convert an in-memory document and return the converted bytes."""
+        output_format = self.normalize_format(output_format)
+        return self.convert_bytes_many(data, input_format, [output_format], save_as=save_as)[output_format]
+    
+    def convert_bytes_many(self, data: bytes, input_format: str, output_formats: Iterable[str],
+                           parallel: bool = False,
+                           save_as: Optional[str] = None) -> Dict[str, bytes]:
+        """Convert an in-memory document to several formats, reading it once.
         
-        # Write content based on output format
-        output_path = self.output_dir / f"{input_file.stem}{output_format}"
-        self._write_file(output_path, content, output_format)
+        Readers and writers work on in-memory buffers; only PDF input is spilled to
+        a temporary file because poppler needs a path. Nothing is written to the
+        output directory unless ``save_as`` gives a file name whose stem the saved
+        copies take. Metrics are kept as ``last_result`` like file conversions.
+        """
+        input_format = self.resolve_input_format(input_format)
+        formats = self.resolve_output_formats(output_formats)
         
-        return str(output_path)
+        outputs: Dict[str, bytes] = {}
+        result = ConversionResult(save_as or '<memory>', input_format, formats, bytes_in=len(data))
+        self._measure(result, lambda: outputs.update(
+            self._convert_bytes(data, input_format, formats, parallel, save_as, result)))
+        return outputs
     
-    def _read_file(self, file_path: Path, file_format: str) -> str:
-        """Read document content."""
-        if file_format == '.txt':
-            return file_path.read_text(encoding='utf-8')
-        elif file_format == '.docx':
-            doc = DocxDocument(file_path)
-            return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
-        elif file_format == '.pdf':
-            return self._extract_pdf_text(file_path)
-        elif file_format == '.rtf':
-            return self._read_rtf(file_path)
-        elif file_format == '.odt':
-            return self._read_odt(file_path)
-        elif file_format in ('.html', '.htm'):
-            return self._read_html(file_path)
-        elif file_format == '.md':
-            return file_path.read_text(encoding='utf-8')
+    def convert_stream(self, source: BinaryIO, input_format: str, target: BinaryIO,
+                       output_format: str) -> ConversionResult:
+        """Convert from one binary stream to another, e.g. stdin to stdout.
+        
+        Content-identical formats are copied (by the kernel when the streams are
+        files or pipes) and line-oriented pairs are streamed, so neither holds the
+        document in memory; other formats are read into memory and converted like
+        ``convert_bytes``. Streams should have nothing read ahead or left unflushed.
+        """
+        input_format = self.resolve_input_format(input_format)
+        output_format = self.resolve_output_formats([output_format])[0]
+        if not (self._passthrough(input_format, output_format)
+                or self._streamable(input_format, [output_format])):
+            target.write(self.convert_bytes(source.read(), input_format, output_format))
+            return self.last_result
+        
+        result = ConversionResult('<stream>', input_format, [output_format])
+        
+        def run() -> None:
+            if self._passthrough(input_format, output_format):
+                with result.stage('copy'):
+                    result.bytes_in = result.bytes_out = _copy_bytes(source, target)
+                return
+            with result.stage('write'):
+                if (self.STREAM_READERS[input_format] in ('_iter_text', '_iter_html')
+                        or source.seekable()):
+                    seconds = self._timed_stream(source, input_format, target, output_format)
+                else:
+                    # Zip-based documents are read by seeking, so a pipe is spooled to disk
+                    with tempfile.TemporaryFile() as spool:
+                        result.bytes_in = _copy_bytes(source, spool)
+                        spool.seek(0)
+                        seconds = self._timed_stream(spool, input_format, target, output_format)
+                result.add_time(f'write{output_format}', seconds)
+        
+        self._measure(result, run)
+        return result
+    
+    def _measure(self, result: ConversionResult, run: Callable[[], None]) -> None:
+        """Run a conversion, timing it into ``result`` and notifying callbacks."""
+        result.sample_memory()
+        start = time.perf_counter()
+        try:
+            run()
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            result.total_seconds = time.perf_counter() - start
+            self.last_result = result
+            self._notify(result)
+    
+    def _convert_bytes(self, data: bytes, input_format: str, formats: List[str], parallel: bool,
+                       save_as: Optional[str], result: ConversionResult) -> Dict[str, bytes]:
+        """In-memory counterpart of ``_convert``; returns the rendered outputs by format."""
+        # Content-identical formats are the input bytes themselves
+        outputs = {fmt: data for fmt in formats if self._passthrough(input_format, fmt)}
+        pending = [fmt for fmt in formats if fmt not in outputs]
+        outputs.update(self._run_pipeline(data, input_format, pending, None, parallel, result))
+        
+        if save_as:
+            with result.stage('save'):
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                for output_format in formats:
+                    output_path = self.output_dir / f"{Path(save_as).stem}{output_format}"
+                    output_path.write_bytes(outputs[output_format])
+                    result.output_paths.append(str(output_path))
+        
+        result.bytes_out = sum(len(outputs[fmt]) for fmt in formats)
+        return {fmt: outputs[fmt] for fmt in formats}
+    
+    def _convert(self, input_file: Path, input_format: str, formats: List[str],
+                 parallel: bool, result: ConversionResult, output_stem: Optional[str] = None) -> None:
+        """Convert a file into the output directory, recording each stage in ``result``."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stem = output_stem or input_file.stem
+        outputs = {fmt: self.output_dir / f"{stem}{fmt}" for fmt in formats}
+        
+        # Content-identical formats are copied by the kernel, which beats the cache
+        pending = self._copy_passthrough(input_file, input_format, outputs, result)
+        
+        # Writing an output over the input itself would truncate it before it is read
+        with self._in_place_outputs(input_file, outputs, pending):
+            self._run_pipeline(input_file, input_format, pending, outputs, parallel, result)
+        
+        result.output_paths = [str(outputs[fmt]) for fmt in formats]
+        result.bytes_out = sum(outputs[fmt].stat().st_size for fmt in formats)
+    
+    def _run_pipeline(self, source: Union[Path, bytes], input_format: str, formats: List[str],
+                      targets: Optional[Dict[str, Path]], parallel: bool,
+                      result: ConversionResult) -> Dict[str, bytes]:
+        """Run the cache/read/write pipeline for a file or in-memory input.
+        
+        With ``targets`` every output is written to its path and nothing is returned;
+        without, outputs are rendered in memory and returned by format.
+        """
+        rendered: Dict[str, bytes] = {}
+        pending = list(formats)
+        
+        # Serve identical inputs straight from the cache
+        cache_keys = {}
+        if self.cache is not None and pending:
+            with result.stage('hash'):
+                if isinstance(source, Path):
+                    source_hash = self.cache.hash_file(source)
+                else:
+                    source_hash = self.cache.hash_bytes(source)
+            candidates, pending = pending, []
+            with result.stage('cache'):
+                for output_format in candidates:
+                    key = self.cache.key_for(source_hash, input_format, output_format, self.cache_tag())
+                    cached = self.cache.get(key, output_format)
+                    if cached is not None:
+                        try:
+                            if targets is None:
+                                rendered[output_format] = cached.read_bytes()
+                            else:
+                                shutil.copyfile(cached, targets[output_format])
+                            result.cache_hits += 1
+                            continue
+                        except FileNotFoundError:
+                            self._lost_cache_entry()
+                    cache_keys[output_format] = key
+                    pending.append(output_format)
+        if not pending:
+            return rendered
+        
+        # Line-oriented pairs go straight from reader to writer, re-reading the input per
+        # format, so reading is timed as part of each write
+        content = None
+        if not self._streamable(input_format, pending):
+            with result.stage('read'):
+                content = self._read_file(_as_source(source), input_format)
+            if input_format == '.pdf':
+                self._record_pdf_metrics(result)
+            source = None  # the writers only need the content
+        
+        with result.stage('write'):
+            jobs = {fmt: (source, input_format, content, fmt, targets[fmt] if targets else None)
+                    for fmt in pending}
+            if parallel and len(pending) > 1:
+                from concurrent.futures import ProcessPoolExecutor
+                with ProcessPoolExecutor(max_workers=len(pending)) as pool:
+                    futures = {fmt: pool.submit(self._write_output, *args) for fmt, args in jobs.items()}
+                    written = {fmt: future.result() for fmt, future in futures.items()}
+            else:
+                written = {fmt: self._write_output(*args) for fmt, args in jobs.items()}
+            for output_format, (data, seconds) in written.items():
+                if data is not None:
+                    rendered[output_format] = data
+                result.add_time(f'write{output_format}', seconds)
+        
+        if cache_keys:
+            with result.stage('cache'):
+                for output_format, key in cache_keys.items():
+                    self.cache.put(key, output_format,
+                                   rendered[output_format] if targets is None else targets[output_format])
+        return rendered
+    
+    def _write_output(self, source: Union[Path, bytes, None], input_format: str, content: Optional[str],
+                      output_format: str, target: Optional[Path]) -> Tuple[Optional[bytes], float]:
+        """Write one output; return its bytes (None if written to ``target``) and the seconds taken.
+        
+        The output is rendered from ``content``, or streamed from ``source`` when
+        there is no content; without a ``target`` path it is rendered in memory.
+        """
+        start = time.perf_counter()
+        buffer = io.BytesIO() if target is None else None
+        destination = target if target is not None else buffer
+        if content is None:
+            self._timed_stream(_as_source(source), input_format, destination, output_format)
         else:
+            self._write_file(destination, content, output_format)
+        return (buffer.getvalue() if buffer is not None else None), time.perf_counter() - start
+    
+    def _lost_cache_entry(self) -> None:
+        """Count a hit whose entry another process evicted before it was read as a miss."""
+        self.cache.hits -= 1
+        self.cache.misses += 1
+    
+    @contextmanager
+    def _in_place_outputs(self, input_file: Path, outputs: Dict[str, Path], formats: List[str]):
+        """Stage outputs that are the input file itself, renaming them over it at the end.
+        
+        Inside the block those entries of ``outputs`` point at hidden temporary files
+        beside the input, so the input is never truncated before it has been read and
+        is left untouched if the conversion fails.
+        """
+        staged: Dict[str, tuple] = {}
+        for output_format in formats:
+            final = outputs[output_format]
+            if final.exists() and os.path.samefile(input_file, final):
+                fd, temp = tempfile.mkstemp(dir=final.parent, prefix=f".{final.stem}-", suffix=output_format)
+                os.close(fd)
+                staged[output_format] = (Path(temp), final)
+                outputs[output_format] = Path(temp)
+        try:
+            yield
+            for temp, final in staged.values():
+                os.replace(temp, final)
+        finally:
+            for output_format, (temp, final) in staged.items():
+                temp.unlink(missing_ok=True)
+                outputs[output_format] = final
+    
+    def _passthrough(self, input_format: str, output_format: str) -> bool:
+        """Return True if converting between the formats leaves the bytes unchanged."""
+        return self.READERS.get(input_format) == '_read_text' and self.WRITERS.get(output_format) == '_write_text'
+    
+    def _copy_passthrough(self, input_file: Path, input_format: str, outputs: Dict[str, Path],
+                          result: ConversionResult) -> List[str]:
+        """Copy the input to every content-identical output; return the formats left."""
+        copies = [fmt for fmt in outputs if self._passthrough(input_format, fmt)]
+        if copies:
+            with result.stage('copy'):
+                for output_format in copies:
+                    start = time.perf_counter()
+                    target = outputs[output_format]
+                    # Converting a file onto itself has nothing to do
+                    if not (target.exists() and os.path.samefile(input_file, target)):
+                        _copy_bytes(input_file, target)
+                    result.add_time(f'copy{output_format}', time.perf_counter() - start)
+        return [fmt for fmt in outputs if fmt not in copies]
+    
+    def _streamable(self, input_format: str, formats: List[str]) -> bool:
+        """Return True if the input and every output format support line streaming."""
+        return input_format in self.STREAM_READERS and all(fmt in self.STREAM_WRITERS for fmt in formats)
+    
+    def _timed_stream(self, source: Source, input_format: str, target: Target,
+                      output_format: str) -> float:
+        """Stream one conversion from ``source`` to ``target`` and return the seconds taken."""
+        start = time.perf_counter()
+        lines = self._resolve(self.STREAM_READERS[input_format])(source)
+        try:
+            self._resolve(self.STREAM_WRITERS[output_format])(target, lines)
+        finally:
+            # If the writer failed (e.g. a closed pipe), release the reader's wrapper of
+            # ``source`` now, while it is still open, not whenever the generator is collected
+            if hasattr(lines, 'close'):
+                lines.close()
+        return time.perf_counter() - start
+    
+    def _record_pdf_metrics(self, result: ConversionResult) -> None:
+        """Copy the OCR engine's page and stage statistics into ``result``."""
+        methods = self.ocr.page_methods
+        result.pages = len(methods)
+        result.text_layer_pages = methods.count('text')
+        result.ocr_pages = methods.count('ocr')
+        result.checkpoint_pages = self.ocr.checkpoint_hits
+        for stage, seconds in self.ocr.stage_times.items():
+            result.add_time(f'read.{stage}', seconds)
+        result.sample_memory(self.ocr.peak_rss)
+    
+    def _notify(self, result: ConversionResult) -> None:
+        """Hand a result to every metrics callback without letting one break a conversion."""
+        for callback in self.metrics_callbacks:
+            try:
+                callback(result)
+            except Exception as e:
+                warnings.warn(f"Metrics callback {callback!r} failed: {e}")
+    
+    @staticmethod
+    def normalize_format(file_format: str) -> str:
+        """Lower-case a format and make sure it has a leading dot."""
+        file_format = file_format.strip().lower()
+        if not file_format.startswith('.'):
+            file_format = f'.{file_format}'
+        return file_format
+    
+    @classmethod
+    def resolve_input_format(cls, file_format: str) -> str:
+        """Normalise an input format, raising ``ValueError`` if it can't be read."""
+        file_format = cls.normalize_format(file_format)
+        if file_format not in cls.SUPPORTED_READ_FORMATS:
             raise ValueError(f"Cannot read format: {file_format}")
+        return file_format
+    
+    @classmethod
+    def resolve_output_formats(cls, output_formats: Iterable[str]) -> List[str]:
+        """Normalise and validate requested output formats, dropping duplicates."""
+        formats = list(dict.fromkeys(cls.normalize_format(fmt) for fmt in output_formats))
+        if not formats:
+            raise ValueError("No output format given")
+        for output_format in formats:
+            if output_format not in cls.SUPPORTED_WRITE_FORMATS:
+                raise ValueError(f"Cannot write format: {output_format}")
+        return formats
+    
+    def cache_tag(self) -> str:
+        """Describe the converter version and any settings that change output."""
+        return (f"{__version__}|text_layer={self.ocr.text_layer}|{self.ocr.settings.tag()}"
+                f"|pdf={self.pdf_layout},{self.pdf_font or 'helvetica'}")
     
-    def _read_rtf(self, file_path: Path) -> str:
+    @classmethod
+    def register_reader(cls, file_format: str, reader: Callable[..., str]) -> None:
+        """Register ``reader(converter, source) -> str`` for a new input format.
+        
+        ``source`` is a ``Path`` or, for in-memory conversions, a binary buffer.
+        """
+        file_format = cls.normalize_format(file_format)
+        cls.READERS = {**cls.READERS, file_format: reader}
+        # A replaced reader must not be bypassed by the built-in streaming one
+        cls.STREAM_READERS = {fmt: r for fmt, r in cls.STREAM_READERS.items() if fmt != file_format}
+        cls.SUPPORTED_READ_FORMATS = set(cls.READERS)
+        cls.SUPPORTED_FORMATS = cls.SUPPORTED_READ_FORMATS | cls.SUPPORTED_WRITE_FORMATS
+    
+    @classmethod
+    def register_writer(cls, file_format: str, writer: Callable[..., None]) -> None:
+        """Register ``writer(converter, target, content)`` for a new output format.
+        
+        ``target`` is a ``Path`` or, for in-memory conversions, a binary stream.
+        """
+        file_format = cls.normalize_format(file_format)
+        cls.WRITERS = {**cls.WRITERS, file_format: writer}
+        cls.STREAM_WRITERS = {fmt: w for fmt, w in cls.STREAM_WRITERS.items() if fmt != file_format}
+        cls.SUPPORTED_WRITE_FORMATS = set(cls.WRITERS)
+        cls.SUPPORTED_FORMATS = cls.SUPPORTED_READ_FORMATS | cls.SUPPORTED_WRITE_FORMATS
+    
+    def _resolve(self, handler: Union[Reader, Writer]) -> Callable:
+        """Turn a registry entry into a callable bound to this converter."""
+        if isinstance(handler, str):
+            return getattr(self, handler)
+        return lambda *args: handler(self, *args)
+    
+    def _read_file(self, source: Source, file_format: str) -> str:
+        """Read document content."""
+        reader = self.READERS.get(file_format)
+        if reader is None:
+            raise ValueError(f"Cannot read format: {file_format}")
+        return self._resolve(reader)(source)
+    
+    def _read_text(self, source: Source) -> str:
+        """Read a plain text or Markdown file."""
+        return _source_text(source)
+    
+    def _iter_text(self, source: Source) -> Iterator[str]:
+        """Stream a plain text or Markdown file line by line."""
+        return _source_lines(source)
+    
+    def _read_docx(self, source: Source) -> str:
+        """Read DOCX paragraph text."""
+        return '\n'.join(self._docx_paragraphs(source))
+    
+    def _iter_docx(self, source: Source) -> Iterator[str]:
+        """Stream DOCX paragraph text line by line."""
+        return _paragraph_lines(self._docx_paragraphs(source))
+    
+    def _docx_paragraphs(self, source: Source) -> Iterator[str]:
+        """Stream paragraphs from the document XML, falling back to python-docx."""
+        from officexml import UnsupportedDocument, iter_docx_paragraphs
+        try:
+            return iter_docx_paragraphs(source)
+        except UnsupportedDocument:
+            if not isinstance(source, Path):
+                source.seek(0)
+            return iter(self._read_docx_model(source))
+    
+    def _read_docx_model(self, source: Source) -> List[str]:
+        """Read DOCX paragraphs through python-docx's object model."""
+        from docx import Document as DocxDocument
+        doc = DocxDocument(source)
+        return [paragraph.text for paragraph in doc.paragraphs]
+    
+    def _read_rtf(self, source: Source) -> str:
         """Read RTF file content."""
-        rtf_content = file_path.read_text(encoding='utf-8', errors='ignore')
+        from striprtf.striprtf import rtf_to_text
+        rtf_content = _source_text(source, errors='ignore')
         return rtf_to_text(rtf_content)
     
-    def _read_odt(self, file_path: Path) -> str:
+    def _read_odt(self, source: Source) -> str:
         """Read ODT file content."""
-        doc = load_odt(str(file_path))
-        paragraphs = doc.getElementsByType(odf_text.P)
-        return '\n'.join([str(p) for p in paragraphs])
+        return '\n'.join(self._odt_paragraphs(source))
+    
+    def _iter_odt(self, source: Source) -> Iterator[str]:
+        """Stream ODT paragraph text line by line."""
+        return _paragraph_lines(self._odt_paragraphs(source))
+    
+    def _odt_paragraphs(self, source: Source) -> Iterator[str]:
+        """Stream paragraphs from the document XML, falling back to odfpy."""
+        from officexml import UnsupportedDocument, iter_odt_paragraphs
+        try:
+            return iter_odt_paragraphs(source)
+        except UnsupportedDocument:
+            if not isinstance(source, Path):
+                source.seek(0)
+            return iter(self._read_odt_model(source))
     
-    def _read_html(self, file_path: Path) -> str:
+    def _read_odt_model(self, source: Source) -> List[str]:
+        """Read ODT paragraphs through odfpy's object model."""
+        from odf.opendocument import load as load_odt
+        from odf import text as odf_text
+        doc = load_odt(_backend_target(source))
+        return [str(p) for p in doc.getElementsByType(odf_text.P)]
+    
+    def _read_html(self, source: Source) -> str:
         """Read HTML file and extract text content."""
-        html_content = file_path.read_text(encoding='utf-8')
-        soup = BeautifulSoup(html_content, 'html.parser')
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        return soup.get_text(separator='\n', strip=True)
-    
-    def _extract_pdf_text(self, file_path: Path) -> str:
-        """Extract text from PDF using OCR."""
-        images = convert_from_path(file_path)
-        text = ""
-        for image in images:
-            text += pytesseract.image_to_string(image) + "\n"
-        return text
-    
-    def _write_file(self, output_path: Path, content: str, file_format: str) -> None:
+        from htmltext import iter_html_text
+        return '\n'.join(iter_html_text(source))
+    
+    def _iter_html(self, source: Source) -> Iterator[str]:
+        """Stream HTML text content line by line, without building a document tree."""
+        from htmltext import iter_html_text
+        return _paragraph_lines(iter_html_text(source))
+    
+    def _extract_pdf_text(self, source: Source) -> str:
+        """Extract text from PDF, using OCR for pages without a text layer."""
+        if isinstance(source, Path):
+            return self.ocr.extract_text(source)
+        # pdftotext and pdf2image (and OCR worker processes) need a file on disk
+        with tempfile.NamedTemporaryFile(suffix='.pdf', delete=False) as tmp:
+            shutil.copyfileobj(source, tmp)
+        try:
+            return self.ocr.extract_text(Path(tmp.name))
+        finally:
+            os.unlink(tmp.name)
+    
+    def _write_file(self, target: Target, content: str, file_format: str) -> None:
         """Write content to file."""
-        if file_format == '.txt':
-            output_path.write_text(content, encoding='utf-8')
-        elif file_format == '.docx':
-            doc = DocxDocument()
-            for paragraph in content.split('\n'):
-                doc.add_paragraph(paragraph)
-            doc.save(output_path)
-        elif file_format == '.pdf':
-            self._write_pdf(output_path, content)
-        elif file_format == '.rtf':
-            self._write_rtf(output_path, content)
-        elif file_format == '.odt':
-            self._write_odt(output_path, content)
-        elif file_format == '.html':
-            self._write_html(output_path, content)
-        elif file_format == '.md':
-            output_path.write_text(content, encoding='utf-8')
-        else:
+        writer = self.WRITERS.get(file_format)
+        if writer is None:
             raise ValueError(f"Cannot write format: {file_format}")
+        self._resolve(writer)(target, content)
+    
+    def _write_text(self, target: Target, content: str) -> None:
+        """Write content to a plain text or Markdown file."""
+        _write_target(target, content.encode('utf-8'))
+    
+    def _write_docx(self, target: Target, content: str) -> None:
+        """Write content to DOCX file."""
+        from docx import Document as DocxDocument
+        doc = DocxDocument()
+        for paragraph in _iter_lines(content):
+            doc.add_paragraph(paragraph)
+        doc.save(target)
     
-    def _write_pdf(self, output_path: Path, content: str) -> None:
+    def _write_pdf(self, target: Target, content: str) -> None:
         """Write content to PDF file."""
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_margins(10, 10, 10)
-        pdf.set_auto_page_break(auto=True, margin=15)
-        pdf.set_font("Helvetica", size=12)
-        # Calculate effective width (page width minus margins)
-        effective_width = pdf.w - 20  # 10mm left + 10mm right margin
-        # Handle unicode by encoding
-        for line in content.split('\n'):
-            text = line.encode('latin-1', 'replace').decode('latin-1')
-            if text.strip():
-                pdf.multi_cell(effective_width, 10, text)
-            else:
-                pdf.ln(5)  # Add small spacing for empty lines
-        pdf.output(str(output_path))
+        self._stream_pdf(target, _iter_lines(content))
+
+    def _stream_pdf(self, target: Target, lines: Iterable[str]) -> None:
+        """Stream lines to a PDF file, one paragraph per non-blank line."""
+        write_text_pdf(_backend_target(target), lines, font=self.pdf_font, layout=self.pdf_layout)
+    
+    def _stream_text(self, target: Target, lines: Iterable[str]) -> None:
+        """Stream lines to a plain text or Markdown file."""
+        with _text_target(target) as out:
+            first = True
+            for line in lines:
+                if not first:
+                    out.write('\n')
+                out.write(line)
+                first = False
     
-    def _write_rtf(self, output_path: Path, content: str) -> None:
+    def _write_rtf(self, target: Target, content: str) -> None:
         """Write content to RTF file."""
-        # Basic RTF structure
-        rtf_content = r"{\rtf1\ansi\deff0 {\fonttbl {\f0 Times New Roman;}}\f0\fs24 "
-        for line in content.split('\n'):
-            # Escape special RTF characters
-            escaped = line.replace('\\', '\\\\').replace('{', '\\{').replace('}', '\\}')
-            rtf_content += escaped + r"\par "
-        rtf_content += "}"
-        output_path.write_text(rtf_content, encoding='utf-8')
-    
-    def _write_odt(self, output_path: Path, content: str) -> None:
+        self._stream_rtf(target, _iter_lines(content))
+    
+    def _stream_rtf(self, target: Target, lines: Iterable[str]) -> None:
+        """Stream lines to an RTF file, one paragraph per line."""
+        with _text_target(target) as out:
+            # Basic RTF structure
+            out.write(r"{\rtf1\ansi\deff0 {\fonttbl {\f0 Times New Roman;}}\f0\fs24 ")
+            for line in lines:
+                # Escape special RTF characters
+                escaped = line.replace('\\', '\\\\').replace('{', '\\{').replace('}', '\\}')
+                out.write(escaped + r"\par ")
+            out.write("}")
+    
+    def _write_odt(self, target: Target, content: str) -> None:
         """Write content to ODT file."""
+        from odf.opendocument import OpenDocumentText
+        from odf.text import P as OdfParagraph
         doc = OpenDocumentText()
-        for line in content.split('\n'):
+        for line in _iter_lines(content):
             p = OdfParagraph(text=line)
             doc.text.addElement(p)
-        doc.save(str(output_path))
+        doc.save(_backend_target(target))
     
-    def _write_html(self, output_path: Path, content: str) -> None:
+    def _write_html(self, target: Target, content: str) -> None:
         """Write content to HTML file."""
-        paragraphs = '\n'.join([f'    <p>{line}</p>' for line in content.split('\n') if line.strip()])
-        html_content = f"""<!DOCTYPE html>
+        self._stream_html(target, _iter_lines(content))
+    
+    def _stream_html(self, target: Target, lines: Iterable[str]) -> None:
+        """Stream lines to an HTML file, one paragraph per non-blank line."""
+        with _text_target(target) as out:
+            out.write("""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -176,10 +834,15 @@ class DocumentConverter:
     <title>Converted Document</title>
 </head>
 <body>
-{paragraphs}
+""")
+            separator = ''
+            for line in lines:
+                if line.strip():
+                    out.write(f'{separator}    <p>{line}</p>')
+                    separator = '\n'
+            out.write("""
 </body>
-</html>"""
-        output_path.write_text(html_content, encoding='utf-8')
+</html>""")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+"""
+HTML Text Streaming
+Pull the text out of HTML documents as they are parsed, without building a
+BeautifulSoup tree.
+"""
+
+import io
+import re
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Union
+
+CHUNK_CHARS = 64 * 1024
+
+# The digits of an unterminated reference like '&#39abc'; the rest is plain text
+_DECIMAL_REFERENCE = re.compile('^([0-9]+)(.*)')
+_HEX_REFERENCE = re.compile('^([0-9a-f]+)(.*)')
+
+
+def _numeric_charref(name: str) -> str:
+    """Decode the ``name`` of a ``&#...;`` reference the way Beautiful Soup 4.13 does.
+
+    Follows the HTML spec's numeric character reference end state: NUL, surrogates
+    and out-of-range numbers become U+FFFD and C1 controls are read as Windows-1252.
+    """
+    from bs4.dammit import UnicodeDammit
+    base, pattern = 10, _DECIMAL_REFERENCE
+    if name.startswith(('x', 'X')):
+        name, base, pattern = name[1:], 16, _HEX_REFERENCE
+    try:
+        number, extra = int(name, base), ''
+    except ValueError:
+        match = pattern.search(name)
+        if match is None:
+            return name
+        number, extra = int(match.group(1), base), match.group(2)
+    if number == 0 or number > 0x10FFFF or 0xD800 <= number <= 0xDFFF:
+        return '\ufffd' + extra
+    if 0x80 <= number <= 0x9F and number in UnicodeDammit.WINDOWS_1252_TO_UTF8:
+        return UnicodeDammit.WINDOWS_1252_TO_UTF8[number].decode('utf-8') + extra
+    return chr(number) + extra
+
+
+class _TextExtractor(HTMLParser):
+    """Collect the strings BeautifulSoup's ``get_text(strip=True)`` would return.
+
+    Text is cut into strings at every tag, comment and declaration, as Beautiful
+    Soup's html.parser tree builder does. Strings inside script, style, template
+    and ruby annotation elements are dropped, as are comments, doctypes and
+    processing instructions; CDATA sections are kept.
+    """
+
+    def __init__(self) -> None:
+        from bs4.builder import HTMLTreeBuilder
+        from bs4.dammit import EntitySubstitution
+        super().__init__(convert_charrefs=False)
+        # Beautiful Soup's own entity tables, so references decode exactly as before
+        self.entities = EntitySubstitution.HTML_ENTITY_TO_CHARACTER
+        self.void_tags = HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS
+        self.hidden_tags = set(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+        self.strings: List[str] = []
+        self.parts: List[str] = []
+        self.open_tags: List[str] = []
+        self.hidden = 0
+        self.closed_void_tags: List[str] = []
+        self.bailed = False
+
+    def flush(self, keep: bool = True) -> None:
+        """End the current string, keeping it if it has any non-whitespace text."""
+        if self.parts:
+            text = ''.join(self.parts).strip()
+            self.parts = []
+            if text and keep:
+                self.strings.append(text)
+
+    def handle_starttag(self, tag, attrs) -> None:
+        self.flush(not self.hidden)
+        self.open_tags.append(tag)
+        self.hidden += tag in self.hidden_tags
+        if tag in self.void_tags:
+            # html.parser sends no end event for <br> and the like; a later </br> is ignored
+            self.handle_endtag(tag, check_closed=False)
+            self.closed_void_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs) -> None:
+        self.flush(not self.hidden)
+        self.open_tags.append(tag)
+        self.hidden += tag in self.hidden_tags
+        self.handle_endtag(tag, check_closed=False)
+
+    def handle_endtag(self, tag, check_closed: bool = True) -> None:
+        if check_closed and tag in self.closed_void_tags:
+            self.closed_void_tags.remove(tag)
+            return
+        self.flush(not self.hidden)
+        if tag not in self.open_tags:
+            return  # stray end tags close nothing
+        while True:
+            name = self.open_tags.pop()
+            self.hidden -= name in self.hidden_tags
+            if name == tag:
+                break
+
+    def handle_data(self, data) -> None:
+        # html.parser emits a lone '&#' when it gives up on a malformed character
+        # reference and stops parsing until the next feed() or close()
+        self.bailed = self.bailed or data == '&#'
+        self.parts.append(data)
+
+    def handle_charref(self, name) -> None:
+        self.parts.append(_numeric_charref(name))
+
+    def handle_entityref(self, name) -> None:
+        # Unknown names are taken as literal text (without the semicolon)
+        self.parts.append(self.entities.get(name, f'&{name}'))
+
+    def handle_comment(self, data) -> None:
+        self.flush(not self.hidden)
+
+    def handle_decl(self, decl) -> None:
+        self.flush(not self.hidden)
+
+    def handle_pi(self, data) -> None:
+        self.flush(not self.hidden)
+
+    def unknown_decl(self, data) -> None:
+        self.flush(not self.hidden)
+        if data.upper().startswith('CDATA['):
+            # CDATA is kept even inside hidden elements, like Beautiful Soup does
+            self.parts.append(data[len('CDATA['):])
+            self.flush()
+
+
+def iter_html_text(source: Union[Path, BinaryIO], errors: str = 'strict') -> Iterator[str]:
+    """Yield the strings of a UTF-8 HTML document as they are parsed.
+
+    Joined with newlines they equal ``BeautifulSoup(html, 'html.parser')`` with
+    script and style elements removed and ``get_text(separator='\\n', strip=True)``
+    called, but the document is read in chunks and no tree is built, so memory
+    stays flat however large the file is.
+    """
+    if isinstance(source, Path):
+        stream = open(source, encoding='utf-8', errors=errors)
+    else:
+        stream = io.TextIOWrapper(source, encoding='utf-8', errors=errors)
+    try:
+        parser = _TextExtractor()
+        pending = ''
+        while True:
+            chunk = stream.read(CHUNK_CHARS)
+            if not chunk:
+                parser.feed(pending)
+                break
+            # html.parser treats text and entities at the end of its buffer slightly
+            # differently, so only feed it up to the end of a tag
+            pending += chunk
+            cut = pending.rfind('>') + 1
+            if cut:
+                parser.feed(pending[:cut])
+                pending = pending[cut:]
+            yield from parser.strings
+            parser.strings = []
+            if parser.bailed:
+                # Beautiful Soup feeds the whole document at once, so everything after
+                # the bad reference is parsed by close(); do the same
+                parser.rawdata += pending + stream.read()
+                break
+        parser.close()
+        parser.flush(not parser.hidden)
+        yield from parser.strings
+    finally:
+        if isinstance(source, Path):
+            stream.close()
+        else:
+            stream.detach()
@@ -0,0 +1,176 @@
+"""
+Background Conversion Jobs
+A shared queue of in-memory conversions running on warm worker processes.
+"""
+
+import hashlib
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ocr import resolve_workers
+from sandbox import ResourceLimits, SandboxError, SandboxPool, make_pool
+from workers import init_worker, worker_converter, worker_options
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+def _run_job(data: bytes, input_format: str, output_formats: List[str],
+             save_as: Optional[str]) -> Tuple[Dict[str, bytes], dict]:
+    """Convert one upload inside a worker, returning the outputs and its metrics."""
+    converter = worker_converter()
+    outputs = converter.convert_bytes_many(data, input_format, output_formats, save_as=save_as)
+    return outputs, converter.last_result.to_dict()
+
+
+@dataclass
+class Job:
+    """A submitted conversion and its eventual outputs."""
+
+    job_id: str
+    name: str
+    input_format: str
+    output_formats: List[str]
+    bytes_in: int
+    future: Future
+    submitted: float = field(default_factory=time.time)
+
+    @property
+    def status(self) -> str:
+        """One of ``queued``, ``running``, ``done`` or ``failed``."""
+        if not self.future.done():
+            return 'running' if self.future.running() else 'queued'
+        return 'failed' if self._exception() is not None else 'done'
+
+    @property
+    def outputs(self) -> Dict[str, bytes]:
+        """Converted bytes by output format (blocks until the job finishes)."""
+        return self.future.result()[0]
+
+    @property
+    def metrics(self) -> dict:
+        """The worker's ``ConversionResult`` as a dict (blocks until the job finishes)."""
+        return self.future.result()[1]
+
+    @property
+    def error(self) -> Optional[str]:
+        """Failure message, or None if the job is unfinished or succeeded."""
+        e = self._exception()
+        return None if e is None else f"{type(e).__name__}: {e}"
+
+    @property
+    def limit(self) -> Optional[dict]:
+        """The breached resource limit (``SandboxError.to_dict()``), if that is why it failed."""
+        e = self._exception()
+        return e.to_dict() if isinstance(e, SandboxError) and e.over_limit else None
+
+    def _exception(self) -> Optional[BaseException]:
+        """The job's failure, counting a cancelled job (e.g. after an HTTP timeout) as failed."""
+        if not self.future.done():
+            return None
+        if self.future.cancelled():
+            return CancelledError("Conversion was cancelled")
+        return self.future.exception()
+
+
+class JobQueue:
+    """Run in-memory conversions in the background on a pool of warm workers.
+
+    Jobs are keyed by a hash of their input bytes and requested formats, so
+    submitting the same work twice returns the existing job instead of converting
+    again. ``max_pending`` bounds how many unfinished jobs may be queued and
+    ``max_finished`` how many completed jobs are remembered (oldest dropped first).
+    With ``limits`` the workers run in a ``SandboxPool`` and a job that goes over
+    a budget fails with a ``SandboxError`` while its worker is replaced.
+    """
+
+    def __init__(self, workers: int = 0, max_pending: Optional[int] = None,
+                 max_finished: int = 500, converter_options: Optional[dict] = None,
+                 limits: Optional[ResourceLimits] = None):
+        self.workers = resolve_workers(workers)
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self.converter_options = worker_options(converter_options)
+        self.limits = limits or ResourceLimits()
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> Executor:
+        return make_pool(self.workers, self.limits, initializer=init_worker,
+                         initargs=(self.converter_options,), mp_context=multiprocessing.get_context('spawn'))
+
+    @staticmethod
+    def job_key(data: bytes, input_format: str, output_formats: Iterable[str],
+                save_as: Optional[str] = None) -> str:
+        """Identify a job by its content and requested outputs."""
+        digest = hashlib.sha256(data)
+        digest.update(f"\0{input_format}\0{','.join(output_formats)}\0{save_as or ''}".encode('utf-8'))
+        return digest.hexdigest()
+
+    def submit(self, name: str, data: bytes, input_format: str, output_formats: Iterable[str],
+               save_as: Optional[str] = None) -> Job:
+        """Queue a conversion (or return the identical job already queued or finished)."""
+        output_formats = list(output_formats)
+        job_id = self.job_key(data, input_format, output_formats, save_as)
+        with self._lock:
+            existing = self._jobs.get(job_id)
+            if existing is not None and existing.status != 'failed':
+                self._jobs.move_to_end(job_id)
+                return existing
+            if self.max_pending is not None and self._pending() >= self.max_pending:
+                raise QueueFullError(f"Conversion queue is full ({self.max_pending} jobs pending)")
+
+            try:
+                future = self._pool.submit(_run_job, data, input_format, output_formats, save_as)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed by the OOM killer); start a fresh pool
+                self._pool = self._new_pool()
+                future = self._pool.submit(_run_job, data, input_format, output_formats, save_as)
+
+            job = Job(job_id, name, input_format, output_formats, len(data), future)
+            self._jobs[job_id] = job
+            self._jobs.move_to_end(job_id)
+            self._prune()
+            return job
+
+    def full(self) -> bool:
+        """Whether ``max_pending`` unfinished jobs are already queued or running."""
+        with self._lock:
+            return self.max_pending is not None and self._pending() >= self.max_pending
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Return a job by id, if it is still remembered."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _pending(self) -> int:
+        return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def _prune(self) -> None:
+        """Forget the oldest finished jobs beyond ``max_finished``."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.future.done()]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def stats(self) -> dict:
+        """Count jobs by status."""
+        with self._lock:
+            counts = {'queued': 0, 'running': 0, 'done': 0, 'failed': 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        counts['workers'] = self.workers
+        if isinstance(self._pool, SandboxPool):
+            counts['sandbox'] = self._pool.stats()
+        return counts
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the worker pool."""
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,101 @@
+"""
+Conversion Metrics
+Per-stage timings, sizes and memory use collected while a document is converted.
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional
+
+
+def current_rss() -> int:
+    """Return the resident memory of this process in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # No /proc (e.g. macOS): fall back to the high-water mark, reported in bytes there
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class ConversionResult:
+    """Outcome of one conversion plus where its time and memory went.
+
+    ``stages`` maps a stage name to seconds spent in it. Top-level stages are
+    ``copy``, ``hash``, ``cache``, ``read`` and ``write``; dotted names break a stage
+    down, e.g. ``read.rasterize``, ``read.ocr`` or ``write.pdf``. Streamed conversions
+    (line-oriented formats) read while they write, so they only report ``write``,
+    and content-identical formats (.txt and .md) are only copied.
+    Peak memory is sampled at stage boundaries (and per OCR'd page), so it is a
+    close lower bound.
+    """
+
+    input_path: str
+    input_format: str
+    output_formats: List[str]
+    output_paths: List[str] = field(default_factory=list)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    pages: int = 0
+    text_layer_pages: int = 0
+    ocr_pages: int = 0
+    checkpoint_pages: int = 0
+    cache_hits: int = 0
+    stages: Dict[str, float] = field(default_factory=dict)
+    total_seconds: float = 0.0
+    peak_rss: int = 0
+    error: Optional[str] = None
+
+    def add_time(self, name: str, seconds: float) -> None:
+        """Accumulate ``seconds`` against a stage."""
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as ``name`` and sample memory when it ends."""
+        self.stages.setdefault(name, 0.0)  # parents list before their sub-stages
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+            self.sample_memory()
+
+    def sample_memory(self, rss: Optional[int] = None) -> None:
+        """Raise ``peak_rss`` to the current (or given) resident memory if higher."""
+        self.peak_rss = max(self.peak_rss, current_rss() if rss is None else rss)
+
+    def to_dict(self) -> dict:
+        """Return the result as plain JSON-serialisable data."""
+        return asdict(self)
+
+    def format(self) -> str:
+        """Render the stage breakdown as a small text table."""
+        lines = [f"{'stage':<22} {'seconds':>10} {'share':>7}"]
+        total = self.total_seconds or 1e-9
+        for name, seconds in self.stages.items():
+            indent = "  " * name.count(".")
+            lines.append(f"{indent + name:<22} {seconds:>10.4f} {seconds / total:>7.1%}")
+        lines.append(f"{'total':<22} {self.total_seconds:>10.4f}")
+        lines.append("")
+        lines.append(f"bytes in:  {self.bytes_in:,}")
+        lines.append(f"bytes out: {self.bytes_out:,}")
+        if self.pages:
+            lines.append(f"pages:     {self.pages} ({self.text_layer_pages} text layer, "
+                         f"{self.ocr_pages} OCR)")
+        if self.checkpoint_pages:
+            lines.append(f"resumed:   {self.checkpoint_pages} OCR'd page(s) reused from checkpoints")
+        if self.cache_hits:
+            lines.append(f"cache:     {self.cache_hits} of {len(self.output_formats)} output(s) hit")
+        lines.append(f"peak RSS:  {self.peak_rss / (1024 * 1024):.1f} MB")
+        return "\n".join(lines)
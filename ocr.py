@@ -0,0 +1,365 @@
+"""
+OCR Engine
+Extract text from PDFs, reading the embedded text layer where there is one and
+falling back to OCR (optionally spread across worker processes) where there isn't.
+"""
+
+import os
+import subprocess
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from cache import PageCache
+from metrics import current_rss
+
+
+# Pages with fewer non-whitespace characters than this are treated as scans
+MIN_TEXT_CHARS = 20
+
+COLOR_MODES = ("rgb", "gray", "binary")
+
+# Grey level at or above which a pixel becomes white when binarizing
+BINARY_THRESHOLD = 160
+
+# The page cache of a parallel OCR worker process, opened once by ``_init_worker``
+_page_cache: Optional[PageCache] = None
+
+
+@dataclass(frozen=True)
+class OCRSettings:
+    """How pages are rasterized and recognised.
+
+    ``dpi``, ``color`` (``rgb``, ``gray`` or ``binary``), ``thread_count`` and
+    ``use_pdftocairo`` are passed to pdf2image; ``psm`` and ``oem`` become
+    Tesseract's ``--psm``/``--oem`` flags (None keeps Tesseract's default) and
+    ``omp_threads`` caps the OpenMP threads each Tesseract run may use.
+    """
+
+    dpi: int = 200
+    color: str = "rgb"
+    thread_count: int = 1
+    use_pdftocairo: bool = False
+    psm: Optional[int] = None
+    oem: Optional[int] = None
+    omp_threads: Optional[int] = None
+
+    def __post_init__(self):
+        if self.color not in COLOR_MODES:
+            raise ValueError(f"Unknown OCR color mode: {self.color} (choose from {', '.join(COLOR_MODES)})")
+
+    def raster_options(self) -> dict:
+        """Keyword arguments for ``pdf2image.convert_from_path``."""
+        return {
+            "dpi": self.dpi,
+            "grayscale": self.color != "rgb",
+            "thread_count": self.thread_count,
+            "use_pdftocairo": self.use_pdftocairo,
+        }
+
+    def tesseract_config(self) -> str:
+        """Extra command-line flags for Tesseract."""
+        flags = []
+        if self.psm is not None:
+            flags.append(f"--psm {self.psm}")
+        if self.oem is not None:
+            flags.append(f"--oem {self.oem}")
+        return " ".join(flags)
+
+    def prepare(self, image):
+        """Binarize a rasterized page if requested; other modes come out of pdf2image ready."""
+        if self.color != "binary":
+            return image
+        return image.point(lambda level: 255 if level >= BINARY_THRESHOLD else 0, "1")
+
+    def tag(self) -> str:
+        """Describe the settings that change OCR output, for cache keys."""
+        return ",".join(f"{name}={value}" for name, value in asdict(self).items()
+                        if name not in ("thread_count", "omp_threads"))
+
+
+# Named trade-offs between throughput and accuracy
+PROFILES: Dict[str, OCRSettings] = {
+    "fast": OCRSettings(dpi=150, color="binary", thread_count=2, use_pdftocairo=True, psm=6, oem=1),
+    "balanced": OCRSettings(dpi=200, color="gray", thread_count=2, use_pdftocairo=True, psm=3, oem=1),
+    "accurate": OCRSettings(dpi=300, color="gray", use_pdftocairo=True, psm=3, oem=1),
+}
+
+
+def resolve_settings(profile: Union[str, OCRSettings, None] = None, **overrides) -> OCRSettings:
+    """Start from a named profile (or the defaults) and apply any non-None overrides."""
+    if isinstance(profile, OCRSettings):
+        settings = profile
+    elif profile is None:
+        settings = OCRSettings()
+    elif profile in PROFILES:
+        settings = PROFILES[profile]
+    else:
+        raise ValueError(f"Unknown OCR profile: {profile} (choose from {', '.join(PROFILES)})")
+    overrides = {name: value for name, value in overrides.items() if value is not None}
+    return replace(settings, **overrides) if overrides else settings
+
+
+@contextmanager
+def _omp_limit(threads: Optional[int]) -> Iterator[None]:
+    """Cap OpenMP threads for Tesseract runs started inside the block."""
+    if threads is None:
+        yield
+        return
+    previous = os.environ.get("OMP_THREAD_LIMIT")
+    os.environ["OMP_THREAD_LIMIT"] = str(threads)
+    try:
+        yield
+    finally:
+        if previous is None:
+            os.environ.pop("OMP_THREAD_LIMIT", None)
+        else:
+            os.environ["OMP_THREAD_LIMIT"] = previous
+
+
+def resolve_workers(workers: int) -> int:
+    """Turn a worker setting into a process count (0 or less means every core)."""
+    if workers <= 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _init_worker(omp_threads: Optional[int] = None,
+                 page_cache_spec: Optional[Tuple[str, int]] = None) -> None:
+    """Keep each Tesseract process single-threaded so workers don't oversubscribe cores.
+
+    ``page_cache_spec`` is the ``(cache_dir, max_bytes)`` of the page cache; each
+    worker opens it once, so its size is scanned once per worker, not per page.
+    """
+    global _page_cache
+    os.environ["OMP_THREAD_LIMIT"] = str(omp_threads or 1)
+    _page_cache = PageCache(*page_cache_spec) if page_cache_spec else None
+
+
+def has_usable_text(text: str) -> bool:
+    """Return True if an embedded text layer carries enough text to skip OCR."""
+    return sum(1 for char in text if not char.isspace()) >= MIN_TEXT_CHARS
+
+
+def read_text_layer(file_path: Path) -> List[str]:
+    """Return the embedded text of each page using poppler's ``pdftotext``."""
+    result = subprocess.run(
+        ["pdftotext", "-enc", "UTF-8", str(file_path), "-"],
+        capture_output=True, check=True,
+    )
+    # pdftotext terminates every page with a form feed
+    pages = result.stdout.decode("utf-8", errors="replace").split("\f")
+    return pages[:-1] if pages and not pages[-1] else pages
+
+
+def _page_count(file_path: Path) -> int:
+    """Return the number of pages in a PDF."""
+    from pdf2image import pdfinfo_from_path
+    return pdfinfo_from_path(str(file_path))["Pages"]
+
+
+def _page_runs(page_numbers: List[int], max_length: int) -> Iterator[Tuple[int, int]]:
+    """Group sorted page numbers into contiguous (first, last) runs of bounded length."""
+    first = last = None
+    for number in page_numbers:
+        if first is not None and number == last + 1 and number - first < max_length:
+            last = number
+            continue
+        if first is not None:
+            yield first, last
+        first = last = number
+    if first is not None:
+        yield first, last
+
+
+def _recognize_image(image, settings: OCRSettings,
+                     page_cache: Optional[PageCache]) -> Tuple[str, float, float, bool]:
+    """OCR one page image, reusing (and writing) its checkpoint when a page cache is given.
+
+    Returns the text, the seconds spent on the checkpoint lookup and on Tesseract,
+    and whether the text came from a checkpoint.
+    """
+    start = time.perf_counter()
+    key = None
+    if page_cache is not None:
+        key = page_cache.page_key(image, settings.tag())
+        text = page_cache.get_text(key)
+        if text is not None:
+            return text, time.perf_counter() - start, 0.0, True
+    looked_up = time.perf_counter()
+
+    import pytesseract
+    with _omp_limit(settings.omp_threads):
+        text = pytesseract.image_to_string(settings.prepare(image), config=settings.tesseract_config())
+    recognized = time.perf_counter()
+    if page_cache is not None:
+        page_cache.put_text(key, text)
+    return text, looked_up - start + time.perf_counter() - recognized, recognized - looked_up, False
+
+
+def _ocr_page(file_path: str, page_number: int,
+              settings: OCRSettings) -> Tuple[str, float, float, float, bool]:
+    """Rasterize and OCR a single page (runs inside a worker process).
+
+    Returns the text, the seconds spent rasterizing, checkpointing and recognising
+    it, and whether it came from a checkpoint.
+    """
+    from pdf2image import convert_from_path
+    start = time.perf_counter()
+    options = dict(settings.raster_options(), thread_count=1)  # one page, one thread
+    images = convert_from_path(file_path, first_page=page_number, last_page=page_number, **options)
+    rasterize_seconds = time.perf_counter() - start
+    text, checkpoint_seconds, ocr_seconds, cached = _recognize_image(images[0], settings, _page_cache)
+    return text, rasterize_seconds, checkpoint_seconds, ocr_seconds, cached
+
+
+class OCREngine:
+    """Extract the text of every page of a PDF.
+
+    Pages with a usable embedded text layer are read directly; the rest go through
+    Tesseract. With ``page_window`` set, only that many pages are rasterized (or in
+    flight across the worker pool) at once, so memory stays flat regardless of page
+    count. After each run ``page_methods`` records whether each page came from the
+    ``"text"`` layer or ``"ocr"`` and ``stage_times`` holds the seconds spent in
+    ``text_layer``, ``rasterize``, ``checkpoint`` and ``ocr`` (summed across
+    workers). ``settings`` is an ``OCRSettings`` or the name of one of
+    ``PROFILES``. With a ``PageCache``, every OCR'd page is checkpointed as it
+    completes and ``checkpoint_hits`` counts the pages reused from earlier runs.
+    """
+
+    def __init__(self, workers: int = 1, page_window: Optional[int] = None,
+                 text_layer: bool = True, settings: Union[str, OCRSettings, None] = None,
+                 page_cache: Optional[PageCache] = None):
+        self.workers = resolve_workers(workers)
+        self.page_window = page_window
+        self.text_layer = text_layer
+        self.settings = resolve_settings(settings)
+        self.page_cache = page_cache
+        self.peak_rss = 0
+        self.page_methods: List[str] = []
+        self.stage_times: Dict[str, float] = {}
+        self.checkpoint_hits = 0
+
+    def extract_text(self, file_path: Path) -> str:
+        """Extract text from a PDF, one page per line block, in page order."""
+        return "".join(text + "\n" for text in self.iter_pages(file_path))
+
+    def iter_pages(self, file_path: Path) -> Iterator[str]:
+        """Yield the text of each page in order as soon as it is available."""
+        self.peak_rss = current_rss()
+        self.page_methods = []
+        self.stage_times = {}
+        self.checkpoint_hits = 0
+        for text in self._iter_text(file_path):
+            self.peak_rss = max(self.peak_rss, current_rss())
+            yield text
+
+    def _iter_text(self, file_path: Path) -> Iterator[str]:
+        """Merge text-layer pages with OCR'd pages in page order."""
+        embedded = None
+        if self.text_layer:
+            start = time.perf_counter()
+            try:
+                embedded = read_text_layer(file_path)
+            except (OSError, subprocess.CalledProcessError):
+                embedded = None  # pdftotext missing or unable to read this file
+            self._add_time("text_layer", time.perf_counter() - start)
+
+        if embedded is None:
+            for text in self._iter_ocr(file_path):
+                self.page_methods.append("ocr")
+                yield text
+            return
+
+        missing = [number for number, text in enumerate(embedded, 1) if not has_usable_text(text)]
+        ocr_pages = self._iter_ocr(file_path, missing) if missing else iter(())
+        for text in embedded:
+            if has_usable_text(text):
+                self.page_methods.append("text")
+                yield text
+            else:
+                self.page_methods.append("ocr")
+                yield next(ocr_pages)
+
+    def _iter_ocr(self, file_path: Path, page_numbers: Optional[List[int]] = None) -> Iterator[str]:
+        """OCR the given pages (all of them by default), yielding text in order."""
+        if self.workers > 1:
+            return self._iter_parallel(file_path, page_numbers)
+        if self.page_window or page_numbers is not None:
+            return self._iter_windowed(file_path, page_numbers)
+        return self._iter_sequential(file_path)
+
+    def _iter_sequential(self, file_path: Path) -> Iterator[str]:
+        """Rasterize the whole document up front and OCR it in this process."""
+        from pdf2image import convert_from_path
+        start = time.perf_counter()
+        images = convert_from_path(file_path, **self.settings.raster_options())
+        self._add_time("rasterize", time.perf_counter() - start)
+        for image in images:
+            yield self._recognize(image)
+
+    def _iter_windowed(self, file_path: Path, page_numbers: Optional[List[int]] = None) -> Iterator[str]:
+        """Rasterize ``page_window`` pages at a time, releasing each image once read."""
+        from pdf2image import convert_from_path
+        if page_numbers is None:
+            page_numbers = list(range(1, _page_count(file_path) + 1))
+        window = self.page_window or len(page_numbers)
+        for first, last in _page_runs(page_numbers, window):
+            start = time.perf_counter()
+            images = convert_from_path(file_path, first_page=first, last_page=last,
+                                       **self.settings.raster_options())
+            self._add_time("rasterize", time.perf_counter() - start)
+            while images:
+                yield self._recognize(images.pop(0))
+
+    def _iter_parallel(self, file_path: Path, page_numbers: Optional[List[int]] = None) -> Iterator[str]:
+        """Fan pages out across a process pool and yield them back in order."""
+        from concurrent.futures import ProcessPoolExecutor
+        if page_numbers is None:
+            page_numbers = list(range(1, _page_count(file_path) + 1))
+        if not page_numbers:
+            return
+
+        # Each worker rasterizes its own page, so only text crosses process boundaries
+        page_cache_spec = None
+        if self.page_cache is not None:
+            page_cache_spec = (str(self.page_cache.cache_dir), self.page_cache.max_bytes)
+        in_flight = self.page_window or len(page_numbers)
+        pending = deque()
+        with ProcessPoolExecutor(
+            max_workers=min(self.workers, len(page_numbers)),
+            initializer=_init_worker,
+            initargs=(self.settings.omp_threads, page_cache_spec),
+        ) as pool:
+            for page_number in page_numbers:
+                pending.append(pool.submit(_ocr_page, str(file_path), page_number, self.settings))
+                if len(pending) >= in_flight:
+                    yield self._collect(pending.popleft().result())
+            while pending:
+                yield self._collect(pending.popleft().result())
+
+    def _add_time(self, stage: str, seconds: float) -> None:
+        self.stage_times[stage] = self.stage_times.get(stage, 0.0) + seconds
+
+    def _collect(self, page: Tuple[str, float, float, float, bool]) -> str:
+        """Record a worker's timings and return its text."""
+        text, rasterize_seconds, checkpoint_seconds, ocr_seconds, cached = page
+        self._add_time("rasterize", rasterize_seconds)
+        self._record(checkpoint_seconds, ocr_seconds, cached)
+        return text
+
+    def _recognize(self, image) -> str:
+        """Run Tesseract on one page image (or reuse its checkpoint), timing it."""
+        text, checkpoint_seconds, ocr_seconds, cached = _recognize_image(image, self.settings,
+                                                                         self.page_cache)
+        self._record(checkpoint_seconds, ocr_seconds, cached)
+        return text
+
+    def _record(self, checkpoint_seconds: float, ocr_seconds: float, cached: bool) -> None:
+        if self.page_cache is not None:
+            self._add_time("checkpoint", checkpoint_seconds)
+        self._add_time("ocr", ocr_seconds)
+        self.checkpoint_hits += cached
@@ -0,0 +1,155 @@
+"""
+Office XML Streaming
+Pull paragraph text out of DOCX and ODT files by parsing their XML incrementally,
+without building python-docx or odfpy object models.
+"""
+
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+REL = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+OFFICE_DOCUMENT = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument'
+TEXT_P = '{urn:oasis:names:tc:opendocument:xmlns:text:1.0}p'
+
+# Run children and the text python-docx gives them (w:br depends on its type)
+_RUN_TEXT = {
+    f'{W}tab': '\t',
+    f'{W}ptab': '\t',
+    f'{W}cr': '\n',
+    f'{W}noBreakHyphen': '-',
+}
+
+
+class UnsupportedDocument(ValueError):
+    """Raised when a file can't be streamed, so callers can fall back to the object model."""
+
+
+def _open_archive(source: Union[Path, BinaryIO], part: Optional[str] = None) -> zipfile.ZipFile:
+    """Open a document package, checking that it contains ``part`` if given."""
+    try:
+        archive = zipfile.ZipFile(source)
+    except (zipfile.BadZipFile, OSError) as e:
+        raise UnsupportedDocument(str(e)) from e
+    if part is not None and part not in archive.namelist():
+        archive.close()
+        raise UnsupportedDocument(f"{part} not found in archive")
+    return archive
+
+
+def _docx_main_part(archive: zipfile.ZipFile) -> str:
+    """Follow the package relationships to the main document part."""
+    try:
+        rels = ET.fromstring(archive.read('_rels/.rels'))
+    except (KeyError, ET.ParseError):
+        return 'word/document.xml'
+    for rel in rels.iter(f'{REL}Relationship'):
+        if rel.get('Type') == OFFICE_DOCUMENT:
+            return posixpath.normpath(rel.get('Target', '').lstrip('/'))
+    return 'word/document.xml'
+
+
+def _iterparse(stream, keep: Optional[str] = None) -> Iterator[Tuple[str, ET.Element, List[ET.Element]]]:
+    """Yield (event, element, open elements) while pruning each element once it ends.
+
+    Handlers must take what they need from an element at its ``end`` event; after
+    that it is detached from its parent, so memory stays bounded by nesting depth.
+    Elements inside an open ``keep`` element are left in place until it ends, so
+    its whole subtree can be read then.
+    """
+    path: List[ET.Element] = []
+    kept = 0
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            path.append(element)
+            kept += element.tag == keep
+            yield event, element, path
+        else:
+            yield event, element, path
+            path.pop()
+            kept -= element.tag == keep
+            if path and not kept:
+                path[-1].remove(element)
+
+
+def iter_docx_paragraphs(source: Union[Path, BinaryIO]) -> Iterator[str]:
+    """Yield the text of each body-level paragraph, as python-docx's ``paragraph.text`` does.
+
+    Runs directly in a paragraph or inside a hyperlink contribute their text, tabs,
+    line breaks and non-breaking hyphens; tables, text boxes and tracked changes are
+    skipped exactly like ``Document.paragraphs`` skips them. Raises
+    ``UnsupportedDocument`` up front if the file is not a readable DOCX package.
+    """
+    archive = _open_archive(source)
+    part = _docx_main_part(archive)
+    if part not in archive.namelist():
+        archive.close()
+        raise UnsupportedDocument(f"{part} not found in archive")
+    return _docx_paragraphs(archive, part)
+
+
+def _docx_paragraphs(archive: zipfile.ZipFile, part: str) -> Iterator[str]:
+    body, paragraph, run, hyperlink = f'{W}body', f'{W}p', f'{W}r', f'{W}hyperlink'
+    text, line_break = f'{W}t', f'{W}br'
+    try:
+        with archive.open(part) as stream:
+            parts: List[str] = []
+            for event, element, path in _iterparse(stream):
+                tag = element.tag
+                if event != 'end' or not (tag == paragraph or tag == text or tag == line_break
+                                          or tag in _RUN_TEXT):
+                    continue
+                # Closest ancestors first: parent, grandparent, ...
+                ancestors = [e.tag for e in path[-2:-6:-1]]
+                if tag == paragraph:
+                    if ancestors[:1] == [body]:
+                        yield ''.join(parts)
+                        parts = []
+                elif ancestors[:3] == [run, paragraph, body] or ancestors == [run, hyperlink, paragraph, body]:
+                    if tag == text:
+                        parts.append(element.text or '')
+                    elif tag == line_break:
+                        if element.get(f'{W}type', 'textWrapping') == 'textWrapping':
+                            parts.append('\n')
+                    else:
+                        parts.append(_RUN_TEXT[tag])
+    finally:
+        archive.close()
+
+
+def iter_odt_paragraphs(source: Union[Path, BinaryIO]) -> Iterator[str]:
+    """Yield the text of every ``text:p``, in the order odfpy's ``getElementsByType`` lists them.
+
+    That is the paragraphs of ``content.xml`` followed by those of ``styles.xml``
+    (headers and footers), in the order odfpy parses them: each outer paragraph
+    before any nested in it, with nested text included in the parent's. Raises
+    ``UnsupportedDocument`` up front if the file has no ``content.xml``.
+    """
+    return _odt_paragraphs(_open_archive(source, 'content.xml'))
+
+
+def _odt_paragraphs(archive: zipfile.ZipFile) -> Iterator[str]:
+    try:
+        for part in ('content.xml', 'styles.xml'):
+            if part not in archive.namelist():
+                continue
+            with archive.open(part) as stream:
+                # Slots keep outer paragraphs ahead of the nested ones that end first
+                slots: List[str] = []
+                open_slots: List[int] = []
+                for event, element, _ in _iterparse(stream, keep=TEXT_P):
+                    if element.tag != TEXT_P:
+                        continue
+                    if event == 'start':
+                        open_slots.append(len(slots))
+                        slots.append('')
+                        continue
+                    slots[open_slots.pop()] = ''.join(element.itertext())
+                    if not open_slots:
+                        yield from slots
+                        slots = []
+    finally:
+        archive.close()
@@ -0,0 +1,268 @@
+"""
+PDF Writer
+Lay out plain text as PDF pages with fpdf2, wrapping whole paragraphs at once and
+embedding Unicode TTF fonts whose parsed metrics are shared across documents.
+"""
+
+import copy
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+# "bulk" wraps each paragraph here and emits one cell per row; "lines" leaves the
+# wrapping to fpdf2's multi_cell, which re-measures the text character by character
+PDF_LAYOUTS = ("bulk", "lines")
+
+FONT_FAMILY = "document"
+FONT_SIZE = 12
+LINE_HEIGHT = 10
+BLANK_LINE_HEIGHT = 5
+MARGIN = 10
+BOTTOM_MARGIN = 15
+
+# Unicode fonts tried, in order, for pdf_font="auto"
+FONT_ENV_VAR = "FILE_CONVERTER_PDF_FONT"
+FONT_SEARCH_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/noto/NotoSans-Regular.ttf",
+    "/usr/share/fonts/noto/NotoSans-Regular.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",
+    "C:/Windows/Fonts/arialuni.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+)
+
+# The bulk layout and font sharing use fpdf2 internals (TextLine, _preload_*_text,
+# _render_styled_text_line, TTFFont attributes) as found in these releases
+# [first, last); any other fpdf2 gets the public multi_cell and add_font paths
+FPDF_INTERNALS_VERSIONS = ((2, 8, 0), (2, 9, 0))
+
+# Parsed fonts by (path, mtime), kept for the life of the process. Each entry is a
+# TTFFont that is never rendered itself, only cloned, or None if it can't be shared.
+_font_templates: Dict[Tuple[str, float], object] = {}
+
+
+def find_unicode_font() -> Optional[Path]:
+    """Return the first Unicode TTF font found on this system, or None."""
+    for candidate in FONT_SEARCH_PATHS:
+        path = Path(candidate)
+        if path.is_file():
+            return path
+    return None
+
+
+def resolve_font(font: Union[str, Path, None]) -> Optional[Path]:
+    """Turn a ``pdf_font`` option into a font file, or None for the built-in Helvetica.
+
+    ``font`` is a path to a .ttf/.otf file, ``"auto"`` to pick a system Unicode
+    font (falling back to Helvetica if none is installed), or None to use the
+    ``FILE_CONVERTER_PDF_FONT`` environment variable if it is set.
+    """
+    if font is None:
+        font = os.environ.get(FONT_ENV_VAR) or None
+    if font is None:
+        return None
+    if str(font).lower() == "auto":
+        return find_unicode_font()
+    path = Path(font).expanduser()
+    if not path.is_file():
+        raise ValueError(f"PDF font not found: {font}")
+    return path
+
+
+@lru_cache(maxsize=None)
+def fpdf_internals_supported() -> bool:
+    """Return True if the installed fpdf2 has the internals the fast paths rely on."""
+    import fpdf
+    try:
+        version = tuple(int(part) for part in fpdf.__version__.split(".")[:3])
+    except ValueError:
+        return False
+    first, last = FPDF_INTERNALS_VERSIONS
+    if not first <= version < last:
+        return False
+    try:
+        from fpdf.line_break import TextLine
+    except ImportError:
+        return False
+    methods = ("normalize_text", "_preload_bidirectional_text", "_preload_font_styles",
+               "_render_styled_text_line")
+    return (all(hasattr(fpdf.FPDF, name) for name in methods)
+            and {"fragments", "number_of_spaces", "align", "height", "max_width"}
+            <= set(getattr(TextLine, "_fields", ())))
+
+
+def clear_font_cache() -> None:
+    """Forget every parsed font, e.g. after replacing font files."""
+    _font_templates.clear()
+
+
+def _clone_font(template, pdf):
+    """Give ``pdf`` its own copy of a parsed font, sharing the read-only metrics."""
+    from fontTools import ttLib
+    from fpdf.fonts import SubsetMap
+    font = copy.copy(template)
+    font.i = len(pdf.fonts) + 1
+    # Subsetting at output time modifies the fontTools object, so every document
+    # opens the file afresh (lazily, so only the tables it embeds are read)
+    font.ttfont = ttLib.TTFont(template.ttffile, recalcTimestamp=False,
+                               fontNumber=template.collection_font_number, lazy=True)
+    font.subset = SubsetMap(font)
+    font.missing_glyphs = []
+    font.biggest_size_pt = 0
+    font._hbfont = None
+    return font
+
+
+def add_cached_font(pdf, path: Path, family: str = FONT_FAMILY) -> None:
+    """Register the TTF font at ``path`` on ``pdf``, parsing it at most once per process.
+
+    The character widths, cmap and glyph ids are computed the first time a font is
+    used and reused for every later document. Fonts that fpdf2 has to patch while
+    loading (no .notdef glyph, colour fonts) are loaded normally each time.
+    """
+    if not fpdf_internals_supported():
+        pdf.add_font(family, "", str(path))
+        return
+    key = (str(path), path.stat().st_mtime)
+    if key not in _font_templates:
+        _font_templates[key] = _parse_font(pdf, path, family)
+        return
+    template = _font_templates[key]
+    if template is None:
+        pdf.add_font(family, "", str(path))
+        return
+    try:
+        pdf.fonts[family.lower()] = _clone_font(template, pdf)
+    except (AttributeError, ImportError, TypeError):
+        # A different fpdf2 release laid TTFFont out differently: stop sharing
+        _font_templates[key] = None
+        pdf.add_font(family, "", str(path))
+
+
+def _parse_font(pdf, path: Path, family: str):
+    """Load a font on ``pdf`` and return a pristine copy to clone, or None if unshareable."""
+    from fontTools import ttLib
+    pdf.add_font(family, "", str(path))
+    font = pdf.fonts[family.lower()]
+    try:
+        pristine = ttLib.TTFont(str(path), recalcTimestamp=False,
+                                fontNumber=font.collection_font_number, lazy=True)
+        patched = "glyf" in pristine and ".notdef" not in pristine.getGlyphOrder()
+        if patched or font.color_font is not None:
+            return None
+        template = copy.copy(font)
+        # Clones open their own fontTools object, so the template needs none
+        template.ttfont = None
+        return template
+    except Exception:
+        return None
+
+
+class _CharWidths(dict):
+    """Widths of single characters in the current font, measured on first use."""
+
+    def __init__(self, pdf):
+        super().__init__()
+        self.pdf = pdf
+
+    def __missing__(self, char: str) -> float:
+        width = self[char] = self.pdf.get_string_width(char)
+        return width
+
+
+def _wrap(text: str, widths: _CharWidths, max_width: float) -> Iterator[str]:
+    """Yield the rows of one paragraph, breaking at spaces like multi_cell does."""
+    space = widths[' ']
+    row = []
+    row_width = 0.0
+    for word in text.split(' '):
+        word_width = sum(map(widths.__getitem__, word))
+        if word_width > max_width:
+            # A word wider than the page is split wherever it runs out of room
+            if row:
+                yield ' '.join(row)
+                row, row_width = [], 0.0
+            start, width = 0, 0.0
+            for end, char in enumerate(word):
+                if width + widths[char] > max_width and end > start:
+                    yield word[start:end]
+                    start, width = end, 0.0
+                width += widths[char]
+            word, word_width = word[start:], width
+        if row and row_width + space + word_width > max_width:
+            yield ' '.join(row)
+            row, row_width = [word], word_width
+        elif row:
+            row.append(word)
+            row_width += space + word_width
+        else:
+            row, row_width = [word], word_width
+    yield ' '.join(row)
+
+
+def _justified_cell(pdf, width: float, text: str) -> None:
+    """Print one justified row and move to the next line.
+
+    ``cell()`` refuses to justify, so this does what multi_cell does internally,
+    with the same alignment and space count. Only called when
+    ``fpdf_internals_supported()``.
+    """
+    from fpdf import Align, XPos, YPos
+    from fpdf.line_break import TextLine
+    text = pdf.normalize_text(text)
+    fragments = (pdf._preload_bidirectional_text(text, False) if pdf.text_shaping
+                 else pdf._preload_font_styles(text, False))
+    line = TextLine(fragments, text_width=0, number_of_spaces=text.count(' '), align=Align.J,
+                    height=LINE_HEIGHT, max_width=width)
+    pdf._render_styled_text_line(line, LINE_HEIGHT, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+
+
+def write_text_pdf(target: Union[str, BinaryIO], lines: Iterable[str],
+                   font: Optional[Path] = None, layout: str = "bulk") -> None:
+    """Write ``lines`` to a PDF, one paragraph per non-blank line.
+
+    With no ``font`` the built-in Helvetica is used and characters outside Latin-1
+    become '?'; with a TTF font the used glyphs are subset and embedded. Both
+    layouts use the same page geometry (A4, 10 mm margins, 12 pt text) and wrap
+    rows at the same words. Paragraphs containing tabs or runs of spaces, whose
+    justification ``_wrap`` doesn't reproduce, and every paragraph on an fpdf2
+    without the internals the bulk layout needs, go through ``multi_cell``.
+    """
+    if layout not in PDF_LAYOUTS:
+        raise ValueError(f"Unknown PDF layout: {layout} (expected one of {', '.join(PDF_LAYOUTS)})")
+    from fpdf import FPDF, XPos, YPos
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_margins(MARGIN, MARGIN, MARGIN)
+    pdf.set_auto_page_break(auto=True, margin=BOTTOM_MARGIN)
+    if font is not None:
+        add_cached_font(pdf, font)
+        pdf.set_font(FONT_FAMILY, size=FONT_SIZE)
+    else:
+        pdf.set_font("Helvetica", size=FONT_SIZE)
+    effective_width = pdf.w - 2 * MARGIN
+    widths = _CharWidths(pdf)
+    # multi_cell keeps a cell margin on both sides of the text
+    max_width = effective_width - 2 * pdf.c_margin
+    bulk = layout == "bulk" and fpdf_internals_supported()
+    for line in lines:
+        text = line if font is not None else line.encode('latin-1', 'replace').decode('latin-1')
+        if not text.strip():
+            pdf.ln(BLANK_LINE_HEIGHT)
+        elif not bulk or '\t' in text or '  ' in text:
+            # Back to the left margin, or the next paragraph would start off the page
+            pdf.multi_cell(effective_width, LINE_HEIGHT, text, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        else:
+            # Like multi_cell, justify every row but the last of a paragraph
+            rows = _wrap(text, widths, max_width)
+            row = next(rows)
+            for following in rows:
+                _justified_cell(pdf, effective_width, row)
+                row = following
+            pdf.cell(effective_width, LINE_HEIGHT, row, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.output(target)
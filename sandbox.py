@@ -0,0 +1,423 @@
+"""
+Sandboxed Workers
+Run conversions in warm, reusable worker processes with CPU-time, wall-time and
+memory budgets, killing and replacing any worker that goes over one.
+"""
+
+import math
+import multiprocessing
+import os
+import pickle
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows: CPU time is not limited
+    resource = None
+
+# How often a running job's elapsed time, CPU time and memory are checked
+POLL_INTERVAL = 0.05
+# Extra CPU seconds before the kernel's RLIMIT_CPU backstop fires where the pool can sample /proc
+CPU_BACKSTOP_MARGIN = 1.0
+# Seconds a worker gets to exit on its own before it is killed
+STOP_TIMEOUT = 5.0
+
+CPU_LIMIT_ENV_VAR = "FILE_CONVERTER_CPU_LIMIT"
+TIME_LIMIT_ENV_VAR = "FILE_CONVERTER_TIME_LIMIT"
+MEMORY_LIMIT_ENV_VAR = "FILE_CONVERTER_MEMORY_LIMIT"
+
+
+@dataclass(frozen=True)
+class ResourceLimits:
+    """Per-job budgets; None leaves that resource unlimited.
+
+    All three are enforced by the pool, which samples the CPU time and resident
+    memory of the worker and any programs it started (pdftoppm, tesseract) every
+    ``POLL_INTERVAL`` seconds where ``/proc`` is available. ``RLIMIT_CPU`` backs
+    up ``cpu_seconds`` on POSIX, and is the only CPU check where ``/proc`` is missing.
+    """
+
+    cpu_seconds: Optional[float] = None
+    wall_seconds: Optional[float] = None
+    memory_mb: Optional[float] = None
+
+    def __bool__(self) -> bool:
+        return any(value is not None for value in asdict(self).values())
+
+    @classmethod
+    def from_env(cls) -> 'ResourceLimits':
+        """Read limits from ``FILE_CONVERTER_CPU_LIMIT``, ``_TIME_LIMIT`` and ``_MEMORY_LIMIT`` (MB)."""
+        values = []
+        for name in (CPU_LIMIT_ENV_VAR, TIME_LIMIT_ENV_VAR, MEMORY_LIMIT_ENV_VAR):
+            value = os.environ.get(name)
+            try:
+                values.append(float(value) if value else None)
+            except ValueError:
+                raise ValueError(f"{name} must be a number, got {value!r}") from None
+        return cls(*values)
+
+
+class SandboxError(RuntimeError):
+    """A sandboxed job was stopped because it went over a limit or its worker died.
+
+    ``reason`` is ``cpu_time``, ``wall_time``, ``memory`` or ``crashed``; ``limit``
+    and ``used`` are in seconds or MB.
+    """
+
+    MESSAGES = {
+        'cpu_time': "Conversion exceeded the CPU time limit",
+        'wall_time': "Conversion exceeded the time limit",
+        'memory': "Conversion exceeded the memory limit",
+        'crashed': "Conversion worker crashed",
+    }
+    UNITS = {'cpu_time': 's', 'wall_time': 's', 'memory': ' MB'}
+    LIMIT_REASONS = ('cpu_time', 'wall_time', 'memory')
+
+    def __init__(self, reason: str, limit: Optional[float] = None, used: Optional[float] = None,
+                 exitcode: Optional[int] = None):
+        self.reason = reason
+        self.limit = limit
+        self.used = used
+        self.exitcode = exitcode
+        details = []
+        unit = self.UNITS.get(reason, '')
+        if used is not None:
+            details.append(f"used {used:.1f}{unit}")
+        if limit is not None:
+            details.append(f"limit {limit:g}{unit}")
+        if exitcode is not None:
+            details.append(f"exit code {exitcode}")
+        message = self.MESSAGES[reason] + (f" ({', '.join(details)})" if details else "")
+        super().__init__(message)
+
+    @property
+    def over_limit(self) -> bool:
+        """True if the job went over a budget, False if its worker just died."""
+        return self.reason in self.LIMIT_REASONS
+
+    def to_dict(self) -> dict:
+        """The error as JSON-ready fields, for summaries and HTTP responses."""
+        return {'error': str(self), 'reason': self.reason, 'limit': self.limit, 'used': self.used,
+                'exitcode': self.exitcode}
+
+
+def _process_tree(pid: int) -> Iterator[int]:
+    """Yield ``pid`` and all its descendants (Linux ``/proc``); vanished processes are skipped."""
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        yield current
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as children:
+                    pending.extend(int(child) for child in children.read().split())
+        except (OSError, ValueError):
+            continue  # exited while we were looking
+
+
+def _process_tree_rss(pid: int) -> Optional[int]:
+    """Resident bytes of ``pid`` and all its descendants, or None without ``/proc``."""
+    if not os.path.isdir('/proc/self/task'):
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for current in _process_tree(pid):
+        try:
+            with open(f"/proc/{current}/statm") as statm:
+                total += int(statm.read().split()[1]) * page_size
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+def _process_tree_cpu(pid: int) -> Optional[float]:
+    """CPU seconds used by ``pid`` and all its descendants, or None without ``/proc``.
+
+    Each process counts its own user and system time plus that of children it
+    has already reaped, so programs that ran and exited during a job are included.
+    """
+    if not os.path.isdir('/proc/self/task'):
+        return None
+    ticks = os.sysconf("SC_CLK_TCK")
+    total = 0
+    for current in _process_tree(pid):
+        try:
+            with open(f"/proc/{current}/stat") as stat:
+                # Fields after the parenthesised command name; utime, stime, cutime, cstime are 11-14
+                fields = stat.read().rsplit(')', 1)[1].split()
+            total += sum(int(value) for value in fields[11:15])
+        except (OSError, ValueError, IndexError):
+            continue
+    return total / ticks
+
+
+def _send_reply(conn, status: str, value: Any) -> None:
+    """Send a job's outcome, replacing anything that can't be pickled with a RuntimeError."""
+    try:
+        conn.send((status, value))  # pickles in full before writing anything
+    except (pickle.PicklingError, TypeError, AttributeError) as e:
+        if isinstance(value, BaseException):
+            value = RuntimeError(f"{type(value).__name__}: {value}")
+        else:
+            value = RuntimeError(f"Result could not be sent back from the worker: {e}")
+        conn.send(('error', value))
+
+
+def _set_cpu_budget(seconds: Optional[float]) -> None:
+    """Let the kernel stop this process after ``seconds`` more CPU time (None = unlimited).
+
+    Where the pool samples ``/proc`` this is only a backstop, set
+    ``CPU_BACKSTOP_MARGIN`` past the limit so the pool's own check fires first.
+    """
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    if os.path.isdir('/proc/self/task'):
+        seconds += CPU_BACKSTOP_MARGIN
+    # The kernel counts whole seconds and sends SIGXCPU once the soft limit is reached
+    soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _worker_main(conn, initializer: Optional[Callable], initargs: Tuple) -> None:
+    """Serve jobs from ``conn`` until told to stop or the parent goes away."""
+    if hasattr(os, 'setpgrp'):
+        # Own process group, so a kill also reaches pdftoppm/tesseract children,
+        # and Ctrl+C in the terminal is left to the parent
+        os.setpgrp()
+    if resource is not None:
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))  # no core dump on SIGXCPU
+    init_error = None
+    try:
+        if initializer is not None:
+            initializer(*initargs)
+    except Exception as e:
+        init_error = e
+    conn.send(('ready', None))
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+        fn, args, kwargs, cpu_seconds = message
+        if init_error is not None:
+            _send_reply(conn, 'error', init_error)
+            continue
+        _set_cpu_budget(cpu_seconds)
+        try:
+            status, value = 'ok', fn(*args, **kwargs)
+        except Exception as e:
+            status, value = 'error', e
+        finally:
+            _set_cpu_budget(None)
+        _send_reply(conn, status, value)
+
+
+class _Worker:
+    """One worker process and the pipe used to hand it jobs."""
+
+    def __init__(self, ctx, initializer: Optional[Callable], initargs: Tuple):
+        self.conn, child = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child, initializer, initargs), daemon=True)
+        self.process.start()
+        child.close()
+        self.jobs = 0
+        self.ready = False
+
+    def wait_ready(self) -> None:
+        """Block until the initializer has run (a dead worker shows up on the first job)."""
+        if not self.ready:
+            try:
+                self.conn.recv()
+            except (EOFError, OSError):
+                pass
+            self.ready = True
+
+    def kill(self) -> None:
+        """Kill the worker and everything it started."""
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(self.process.pid, signal.SIGKILL)
+            else:
+                self.process.kill()
+        except (OSError, ProcessLookupError):
+            pass
+        self.process.join()
+        self.conn.close()
+
+    def stop(self) -> None:
+        """Ask the worker to exit, killing it if it doesn't."""
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class SandboxPool(Executor):
+    """A process pool that enforces ``ResourceLimits`` on every job.
+
+    A drop-in for ``ProcessPoolExecutor``: ``submit(fn, *args)`` returns a future
+    and ``initializer(*initargs)`` runs once per worker, which then serves job
+    after job. Workers are started (and warmed up) as soon as the pool is made. A
+    job that goes over a limit has its worker killed, together with any programs
+    it started, and fails with a ``SandboxError``; a fresh worker takes its place
+    straight away. ``max_jobs_per_worker`` also recycles workers after that many
+    jobs, to contain slow leaks.
+    """
+
+    def __init__(self, max_workers: int = 1, limits: Optional[ResourceLimits] = None,
+                 initializer: Optional[Callable] = None, initargs: Tuple = (),
+                 mp_context=None, max_jobs_per_worker: Optional[int] = None):
+        self.limits = limits or ResourceLimits()
+        self.max_workers = max(1, max_workers)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._ctx = mp_context or multiprocessing.get_context('spawn')
+        self._initializer = initializer
+        self._initargs = initargs
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._shutdown = False
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {'jobs': 0, 'recycled': 0, 'cpu_time': 0, 'wall_time': 0,
+                                         'memory': 0, 'crashed': 0}
+        self._threads: List[threading.Thread] = []
+        for index in range(self.max_workers):
+            thread = threading.Thread(target=self._serve, name=f"sandbox-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        """Queue ``fn(*args, **kwargs)`` to run in a worker."""
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            future = Future()
+            self._queue.put((future, fn, args, kwargs))
+            return future
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """Stop taking jobs and stop the workers once the queued jobs are done."""
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is not None:
+                        item[0].cancel()
+            for _ in self._threads:
+                self._queue.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def stats(self) -> Dict[str, int]:
+        """Jobs run, workers recycled and jobs stopped for each reason."""
+        with self._lock:
+            return dict(self.counters)
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.counters[name] += 1
+
+    def _serve(self) -> None:
+        """Feed queued jobs to one worker, replacing it whenever it has to go."""
+        worker = _Worker(self._ctx, self._initializer, self._initargs)
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                future, fn, args, kwargs = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self._count('jobs')
+                try:
+                    status, value = self._run(worker, fn, args, kwargs)
+                except SandboxError as e:
+                    self._count(e.reason)
+                    self._count('recycled')
+                    worker = _Worker(self._ctx, self._initializer, self._initargs)
+                    future.set_exception(e)
+                    continue
+                worker.jobs += 1
+                if self.max_jobs_per_worker and worker.jobs >= self.max_jobs_per_worker:
+                    worker.stop()
+                    self._count('recycled')
+                    worker = _Worker(self._ctx, self._initializer, self._initargs)
+                if status == 'ok':
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        finally:
+            worker.stop()
+
+    def _run(self, worker: _Worker, fn: Callable, args: Tuple, kwargs: dict) -> Tuple[str, Any]:
+        """Run one job on ``worker``, killing it and raising ``SandboxError`` on a breach."""
+        limits = self.limits
+        worker.wait_ready()
+        # The job is charged for CPU used by the worker and its programs from here on
+        cpu_start = _process_tree_cpu(worker.process.pid) if limits.cpu_seconds is not None else None
+        try:
+            worker.conn.send((fn, args, kwargs, limits.cpu_seconds))
+        except (OSError, ValueError):
+            pass  # a dead worker is reported below
+        except Exception as e:
+            return 'error', e  # the job itself can't be pickled
+        start = time.monotonic()
+        while not worker.conn.poll(POLL_INTERVAL):
+            elapsed = time.monotonic() - start
+            if limits.wall_seconds is not None and elapsed > limits.wall_seconds:
+                worker.kill()
+                raise SandboxError('wall_time', limits.wall_seconds, elapsed)
+            if limits.cpu_seconds is not None and cpu_start is not None:
+                cpu = _process_tree_cpu(worker.process.pid)
+                if cpu is not None and cpu - cpu_start > limits.cpu_seconds:
+                    worker.kill()
+                    raise SandboxError('cpu_time', limits.cpu_seconds, cpu - cpu_start)
+            if limits.memory_mb is not None:
+                rss = _process_tree_rss(worker.process.pid)
+                if rss is not None and rss > limits.memory_mb * 1024 * 1024:
+                    worker.kill()
+                    raise SandboxError('memory', limits.memory_mb, rss / (1024 * 1024))
+            if not worker.process.is_alive():
+                break
+        try:
+            return worker.conn.recv()
+        except (EOFError, OSError):
+            pass
+        worker.kill()
+        exitcode = worker.process.exitcode
+        if hasattr(signal, 'SIGXCPU') and exitcode == -signal.SIGXCPU:
+            raise SandboxError('cpu_time', limits.cpu_seconds)
+        raise SandboxError('crashed', exitcode=exitcode)
+
+
+def make_pool(max_workers: int, limits: Optional[ResourceLimits] = None,
+              initializer: Optional[Callable] = None, initargs: Tuple = (), mp_context=None) -> Executor:
+    """Return a ``SandboxPool`` when any limit is set, else a plain ``ProcessPoolExecutor``."""
+    if limits:
+        return SandboxPool(max_workers, limits, initializer=initializer, initargs=initargs,
+                           mp_context=mp_context)
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context,
+                               initializer=initializer, initargs=initargs)
@@ -5,27 +5,50 @@ Generate GitHub wiki pages from the repository README and commit history.
 Pages generated:
   Home.md            - Current README content
   Version-History.md - Changelog grouped by version across all commits to main
+
+History is read with a fixed number of git calls however long it is, and rendered
+entries are cached by commit SHA in .wiki-cache/, so a run only looks at commits
+added since the previous one.
 """
 
+import json
 import re
 import subprocess
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
 
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 WIKI_DIR = REPO_ROOT / "wiki"
+CACHE_FILE = REPO_ROOT / ".wiki-cache" / "version-history.json"
+# Bump when the entry layout changes so cached entries are rendered again
+CACHE_VERSION = 1
+
+# Separates fields in ``git log`` output: it can't occur in a subject, SHA or path and,
+# unlike the ASCII separator characters, str.strip()/splitlines() leave it alone
+SEP = "\x00"
 
 
-def run(cmd: list[str], cwd: Path = REPO_ROOT) -> str:
-    result = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd)
+def run(cmd: list[str], cwd: Path = REPO_ROOT, input: Optional[str] = None) -> str:
+    result = subprocess.run(cmd, capture_output=True, text=True, cwd=cwd, input=input)
     if result.returncode != 0:
         print(f"Command failed: {' '.join(cmd)}\n{result.stderr}", file=sys.stderr)
         sys.exit(1)
     return result.stdout.strip()
 
 
+def run_bytes(cmd: list[str], input: bytes, cwd: Path = REPO_ROOT) -> bytes:
+    """Like ``run`` but with raw bytes in and out, for ``git cat-file`` batches."""
+    result = subprocess.run(cmd, capture_output=True, cwd=cwd, input=input)
+    if result.returncode != 0:
+        print(f"Command failed: {' '.join(cmd)}\n{result.stderr.decode(errors='replace')}",
+              file=sys.stderr)
+        sys.exit(1)
+    return result.stdout
+
+
 def parse_version_from_readme(readme_text: str) -> str:
     """Extract version string from README (e.g. '> Version 1.0' → '1.0')."""
     match = re.search(r">\s*[Vv]ersion\s+([\d.]+)", readme_text)
@@ -37,7 +60,7 @@ def get_commits() -> list[dict]:
     log = run([
         "git", "--no-pager", "log",
         "--reverse",
-        "--format=%H|%ad|%s",
+        "--format=%H%x00%P%x00%ad%x00%s",
         "--date=short",
         "HEAD",
     ])
@@ -45,24 +68,96 @@ def get_commits() -> list[dict]:
     for line in log.splitlines():
         if not line.strip():
             continue
-        sha, date, subject = line.split("|", 2)
-        commits.append({"sha": sha, "date": date, "subject": subject})
+        sha, parents, date, subject = line.split(SEP, 3)
+        commits.append({"sha": sha, "parents": parents.split(), "date": date, "subject": subject})
     return commits
 
 
-def get_changed_files(sha: str) -> list[str]:
-    """List files changed in a commit."""
-    output = run(["git", "--no-pager", "diff-tree", "--no-commit-id", "-r", "--name-only", sha])
-    return [f for f in output.splitlines() if f.strip()]
-
+def get_changed_files(commits: list[dict]) -> dict[str, list[str]]:
+    """List the files changed in each commit, with one ``git log`` for all of them.
 
-def get_readme_at(sha: str) -> str:
-    """Read README.md content at a given commit (empty string if not present)."""
-    result = subprocess.run(
-        ["git", "show", f"{sha}:README.md"],
-        capture_output=True, text=True, cwd=REPO_ROOT
+    Like ``git diff-tree`` on a single commit, root commits and merges list none.
+    """
+    if not commits:
+        return {}
+    output = run(
+        ["git", "--no-pager", "log", "--no-walk=unsorted", "--stdin", "--name-only", "--no-renames",
+         "--format=%x00%H"],
+        input="\n".join(commit["sha"] for commit in commits) + "\n",
+    )
+    changed = {}
+    for record in output.split(SEP)[1:]:
+        sha, *files = record.splitlines()
+        changed[sha] = [f for f in files if f.strip()]
+    for commit in commits:
+        if not commit["parents"]:
+            changed[commit["sha"]] = []
+    return changed
+
+
+def get_readmes(shas: list[str]) -> dict[str, str]:
+    """Read README.md at each commit ('' where it doesn't exist) with two ``git cat-file`` calls.
+
+    Most commits leave the README alone, so each distinct blob is read only once.
+    """
+    if not shas:
+        return {}
+    # First resolve every commit's README to a blob id...
+    check = run_bytes(["git", "cat-file", "--batch-check=%(objectname) %(objecttype)"],
+                      "".join(f"{sha}:README.md\n" for sha in shas).encode())
+    blob_ids = {}
+    for sha, line in zip(shas, check.decode().splitlines()):
+        oid, _, kind = line.partition(" ")
+        if kind == "blob":
+            blob_ids[sha] = oid
+
+    # ...then read each distinct blob once
+    unique = list(dict.fromkeys(blob_ids.values()))
+    contents = {}
+    if unique:
+        output = run_bytes(["git", "cat-file", "--batch"], "".join(f"{oid}\n" for oid in unique).encode())
+        offset = 0
+        for oid in unique:
+            header_end = output.index(b"\n", offset)
+            size = int(output[offset:header_end].split()[2])
+            contents[oid] = output[header_end + 1:header_end + 1 + size].decode("utf-8", errors="replace")
+            offset = header_end + 1 + size + 1
+    return {sha: contents.get(blob_ids.get(sha), "") for sha in shas}
+
+
+def load_cache() -> dict[str, str]:
+    """Return the cached rendered entries by commit SHA, or nothing if stale or unreadable."""
+    try:
+        cache = json.loads(CACHE_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache.get("entries", {})
+
+
+def save_cache(entries: dict[str, str]) -> None:
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    CACHE_FILE.write_text(json.dumps({"version": CACHE_VERSION, "entries": entries}), encoding="utf-8")
+
+
+def render_entry(commit: dict, readme_text: str, changed: list[str]) -> str:
+    """Render one commit's section of the Version History page."""
+    version = parse_version_from_readme(readme_text) if readme_text else "unknown"
+
+    files_section = ""
+    if changed:
+        file_list = "\n".join(f"  - `{f}`" for f in changed)
+        files_section = f"\n**Changed files:**\n{file_list}\n"
+
+    return (
+        f"\n---\n\n"
+        f"## v{version}  \n"
+        f"**Commit:** `{commit['sha'][:8]}`  \n"
+        f"**Date:** {commit['date']}  \n"
+        f"**Summary:** {commit['subject']}\n"
+        f"{files_section}"
     )
-    return result.stdout if result.returncode == 0 else ""
 
 
 def build_home_page() -> str:
@@ -78,6 +173,18 @@ def build_version_history_page() -> str:
     """Return the Version History wiki page content."""
     commits = get_commits()
 
+    # Only commits missing from the cache are looked at in git
+    cached = load_cache()
+    new = [commit for commit in commits if commit["sha"] not in cached]
+    changed = get_changed_files(new)
+    readmes = get_readmes([commit["sha"] for commit in new])
+    entries = {commit["sha"]: cached[commit["sha"]] for commit in commits if commit["sha"] in cached}
+    for commit in new:
+        entries[commit["sha"]] = render_entry(commit, readmes[commit["sha"]], changed[commit["sha"]])
+    save_cache(entries)
+    print(f"Version history: {len(commits)} commits, {len(new)} rendered, "
+          f"{len(commits) - len(new)} from cache")
+
     lines = [
         "# Version History\n",
         "> _Auto-generated from commit history. Each entry represents a commit to `main`._\n",
@@ -85,27 +192,7 @@ def build_version_history_page() -> str:
 
     # Walk commits newest → oldest for display
     for commit in reversed(commits):
-        sha = commit["sha"]
-        date = commit["date"]
-        subject = commit["subject"]
-
-        readme_text = get_readme_at(sha)
-        version = parse_version_from_readme(readme_text) if readme_text else "unknown"
-
-        changed = get_changed_files(sha)
-        files_section = ""
-        if changed:
-            file_list = "\n".join(f"  - `{f}`" for f in changed)
-            files_section = f"\n**Changed files:**\n{file_list}\n"
-
-        lines.append(
-            f"\n---\n\n"
-            f"## v{version}  \n"
-            f"**Commit:** `{sha[:8]}`  \n"
-            f"**Date:** {date}  \n"
-            f"**Summary:** {subject}\n"
-            f"{files_section}"
-        )
+        lines.append(entries[commit["sha"]])
 
     now = datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
     lines.append("\n---")
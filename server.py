@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+File Converter - HTTP Service
+A headless local conversion server backed by warm worker processes.
+
+Endpoints:
+  POST /convert?to=.pdf[,.txt...]&name=report.docx   Body: the raw input file.
+       Returns the converted file (or a ZIP when several formats are requested).
+  GET  /health    Liveness check.
+  GET  /metrics   Request counters and queue statistics as JSON.
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+import zipfile
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import asdict, replace
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+from urllib.parse import parse_qs, quote, urlparse
+
+from converter import DocumentConverter
+from jobs import JobQueue, QueueFullError
+from ocr import PROFILES
+from sandbox import ResourceLimits, SandboxError
+
+MIME_TYPES = {
+    '.txt': 'text/plain; charset=utf-8',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.pdf': 'application/pdf',
+    '.rtf': 'application/rtf',
+    '.odt': 'application/vnd.oasis.opendocument.text',
+    '.html': 'text/html; charset=utf-8',
+    '.md': 'text/markdown; charset=utf-8',
+}
+
+CHUNK_SIZE = 64 * 1024
+
+
+def content_disposition(filename: str) -> str:
+    """An attachment header for ``filename`` that is safe to send whatever the client named it.
+
+    The quoted ``filename`` keeps only printable ASCII (no quotes or line breaks);
+    the real name follows as percent-encoded UTF-8 in ``filename*`` (RFC 6266).
+    """
+    fallback = ''.join(char if ' ' <= char <= '~' and char not in '"\\' else '_' for char in filename)
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+class ConversionService:
+    """Admission control and bookkeeping shared by every request handler."""
+
+    def __init__(self, workers: int = 0, queue_size: int = 32, timeout: float = 120,
+                 max_upload_bytes: int = 100 * 1024 * 1024, ocr_profile: Optional[str] = None,
+                 limits: Optional[ResourceLimits] = None):
+        limits = limits or ResourceLimits()
+        if limits.wall_seconds is None:
+            # A request that times out must also free its worker, or hung jobs fill the queue
+            limits = replace(limits, wall_seconds=timeout)
+        self.queue = JobQueue(workers=workers, max_pending=queue_size, max_finished=queue_size,
+                              converter_options={'ocr_settings': ocr_profile}, limits=limits)
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.max_upload_bytes = max_upload_bytes
+        self.started = time.time()
+        self.counters: Dict[str, float] = {
+            'requests': 0, 'completed': 0, 'failed': 0, 'rejected': 0, 'timeouts': 0, 'limited': 0,
+            'bytes_in': 0, 'bytes_out': 0, 'seconds_total': 0.0,
+        }
+        self._lock = threading.Lock()
+
+    def count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[name] += amount
+
+    def metrics(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        completed = counters['completed'] or 1
+        return {
+            'uptime_seconds': round(time.time() - self.started, 1),
+            'queue_size': self.queue_size,
+            'timeout_seconds': self.timeout,
+            'limits': asdict(self.queue.limits),
+            'jobs': self.queue.stats(),
+            **counters,
+            'mean_seconds': round(counters['seconds_total'] / completed, 4),
+        }
+
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """Route requests to the conversion service."""
+
+    server_version = "FileConverter/2.0"
+
+    @property
+    def service(self) -> ConversionService:
+        return self.server.service
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path == '/health':
+            self._send_json(HTTPStatus.OK, {'status': 'ok'})
+        elif path == '/metrics':
+            self._send_json(HTTPStatus.OK, self.service.metrics())
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint: {path}"})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path != '/convert':
+            self._send_json(HTTPStatus.NOT_FOUND, {'error': f"Unknown endpoint: {url.path}"})
+            return
+        self.service.count('requests')
+
+        query = parse_qs(url.query)
+        name = query.get('name', [self.headers.get('X-Filename', '')])[0]
+        input_format = query.get('from', [Path(name).suffix])[0]
+        output_formats = [fmt for value in query.get('to', []) for fmt in value.split(',') if fmt]
+        if not input_format or not output_formats:
+            self._send_json(HTTPStatus.BAD_REQUEST,
+                            {'error': "Give the input via ?name=file.ext (or ?from=) and formats via ?to="})
+            return
+
+        # The body is read by length, so chunked or unsized uploads can't be accepted
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            self._send_json(HTTPStatus.LENGTH_REQUIRED,
+                            {'error': "Chunked uploads are not supported; send a Content-Length"})
+            return
+        if self.headers.get('Content-Length') is None:
+            self._send_json(HTTPStatus.LENGTH_REQUIRED, {'error': "Content-Length header is required"})
+            return
+        try:
+            length = int(self.headers['Content-Length'])
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            self._send_json(HTTPStatus.BAD_REQUEST,
+                            {'error': f"Invalid Content-Length: {self.headers['Content-Length']!r}"})
+            return
+        if length > self.service.max_upload_bytes:
+            self.close_connection = True  # the body is left unread
+            self._send_json(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                            {'error': f"Upload exceeds {self.service.max_upload_bytes} bytes"})
+            return
+        if self.service.queue.full():
+            # Turn the upload away before reading it; submit() still catches a race below
+            self.service.count('rejected')
+            self.close_connection = True
+            error = f"Conversion queue is full ({self.service.queue.max_pending} jobs pending)"
+            self._send_json(HTTPStatus.TOO_MANY_REQUESTS, {'error': error}, {'Retry-After': '1'})
+            return
+        data = self.rfile.read(length)
+        self.service.count('bytes_in', len(data))
+
+        start = time.perf_counter()
+        try:
+            input_format = DocumentConverter.resolve_input_format(input_format)
+            formats = DocumentConverter.resolve_output_formats(output_formats)
+            job = self.service.queue.submit(name or f"upload{input_format}", data, input_format, formats)
+        except ValueError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {'error': str(e)})
+            return
+        except QueueFullError as e:
+            self.service.count('rejected')
+            self._send_json(HTTPStatus.TOO_MANY_REQUESTS, {'error': str(e)}, {'Retry-After': '1'})
+            return
+
+        try:
+            outputs = job.future.result(timeout=self.service.timeout)
+        except FutureTimeoutError:
+            job.future.cancel()  # only succeeds while still queued
+            self.service.count('timeouts')
+            self._send_json(HTTPStatus.GATEWAY_TIMEOUT,
+                            {'error': f"Conversion did not finish within {self.service.timeout:.0f}s"})
+            return
+        except SandboxError as e:
+            self.service.count('failed')
+            if e.over_limit:
+                self.service.count('limited')
+            self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, e.to_dict())
+            return
+        except Exception as e:
+            self.service.count('failed')
+            self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, {'error': f"{type(e).__name__}: {e}"})
+            return
+
+        outputs = outputs[0]
+        stem = Path(name).stem or 'converted'
+        if len(outputs) == 1:
+            output_format, body = next(iter(outputs.items()))
+            self._send_bytes(body, MIME_TYPES.get(output_format, 'application/octet-stream'),
+                             f"{stem}{output_format}")
+        else:
+            archive = io.BytesIO()
+            with zipfile.ZipFile(archive, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
+                for output_format, body in outputs.items():
+                    zf.writestr(f"{stem}{output_format}", body)
+            self._send_bytes(archive.getvalue(), 'application/zip', f"{stem}.zip")
+        self.service.count('completed')
+        self.service.count('seconds_total', time.perf_counter() - start)
+
+    def _send_bytes(self, body: bytes, content_type: str, filename: str) -> None:
+        """Stream a response body back in chunks."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Content-Disposition', content_disposition(filename))
+        self.end_headers()
+        view = memoryview(body)
+        for offset in range(0, len(body), CHUNK_SIZE):
+            self.wfile.write(view[offset:offset + CHUNK_SIZE])
+        self.service.count('bytes_out', len(body))
+
+    def _send_json(self, status: HTTPStatus, payload: dict, headers: Dict[str, str] = None) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the file converter as a local HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("-j", "--workers", type=int, default=0,
+                        help="Conversion worker processes (0 = all cores)")
+    parser.add_argument("--queue-size", type=int, default=32,
+                        help="Jobs allowed to wait or run before new uploads get 429")
+    parser.add_argument("--timeout", type=float, default=120,
+                        help="Seconds a request waits for its conversion before 504")
+    parser.add_argument("--max-upload-mb", type=int, default=100, help="Largest accepted upload in MB")
+    parser.add_argument("--ocr-profile", choices=sorted(PROFILES), default=None,
+                        help="OCR speed/accuracy preset for scanned PDFs")
+    env_limits = ResourceLimits.from_env()
+    parser.add_argument("--cpu-limit", type=float, default=env_limits.cpu_seconds,
+                        help="CPU seconds one conversion may use before its worker is killed")
+    parser.add_argument("--time-limit", type=float, default=env_limits.wall_seconds,
+                        help="Seconds one conversion may run before its worker is killed "
+                             "(default: --timeout)")
+    parser.add_argument("--memory-limit", type=float, default=env_limits.memory_mb,
+                        help="MB of memory one conversion may use before its worker is killed")
+    args = parser.parse_args()
+
+    limits = ResourceLimits(args.cpu_limit, args.time_limit, args.memory_limit)
+    service = ConversionService(workers=args.workers, queue_size=args.queue_size,
+                                timeout=args.timeout, max_upload_bytes=args.max_upload_mb * 1024 * 1024,
+                                ocr_profile=args.ocr_profile, limits=limits)
+    httpd = ThreadingHTTPServer((args.host, args.port), ConversionHandler)
+    httpd.service = service
+    print(f"🚀 File converter listening on http://{args.host}:{args.port} "
+          f"({service.queue.workers} {'sandboxed ' if limits else ''}workers, queue of {args.queue_size})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        httpd.server_close()
+        service.queue.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
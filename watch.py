@@ -0,0 +1,347 @@
+"""
+Watch Folders
+Keep an output folder in step with input folders, converting only new or changed files.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from batch import candidate_stems
+from cache import ConversionCache
+from converter import DocumentConverter
+from ocr import resolve_workers
+from sandbox import ResourceLimits, SandboxError, make_pool
+from workers import init_worker, worker_converter, worker_options
+
+MANIFEST_NAME = ".convert-manifest.sqlite3"
+DEFAULT_INTERVAL = 2.0
+# Files modified more recently than this are assumed to still be being copied in
+SETTLE_SECONDS = 1.0
+# A file whose worker dies this many times is recorded as failed until it changes
+MAX_ATTEMPTS = 2
+STAGING_PREFIX = ".converting-"
+
+
+class Entry(NamedTuple):
+    """What the manifest knows about one input file."""
+
+    size: int
+    mtime_ns: int
+    sha256: Optional[str]
+    tag: str
+    status: str
+    outputs: List[str]
+    error: Optional[str]
+
+
+class Manifest:
+    """Size, mtime and content hash of every file handled, kept in an SQLite file.
+
+    All entries are loaded into memory when the manifest is opened so that a scan
+    costs one dictionary lookup per file; changes are written through and made
+    durable by ``commit()``.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(self.path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+            "sha256 TEXT, tag TEXT, status TEXT, outputs TEXT, error TEXT, updated REAL)"
+        )
+        self.entries: Dict[str, Entry] = {
+            path: Entry(size, mtime_ns, sha256, tag, status, json.loads(outputs), error)
+            for path, size, mtime_ns, sha256, tag, status, outputs, error in self.db.execute(
+                "SELECT path, size, mtime_ns, sha256, tag, status, outputs, error FROM files")
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, path: str) -> Optional[Entry]:
+        return self.entries.get(path)
+
+    def record(self, path: str, entry: Entry) -> None:
+        """Remember the state ``path`` was converted (or failed) in."""
+        self.entries[path] = entry
+        self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (path, entry.size, entry.mtime_ns, entry.sha256, entry.tag, entry.status,
+                         json.dumps(entry.outputs), entry.error, time.time()))
+
+    def forget(self, paths: Iterable[str]) -> int:
+        """Drop entries for files that no longer exist; return how many were dropped."""
+        paths = [path for path in paths if self.entries.pop(path, None) is not None]
+        self.db.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in paths))
+        return len(paths)
+
+    def commit(self) -> None:
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
+
+
+def scan_folder(root: Path, skip: Set[str] = frozenset()) -> Iterator[Tuple[str, str, os.stat_result]]:
+    """Yield ``(path, subdir, stat)`` for every readable document under ``root``.
+
+    Hidden files and folders, Office lock files and the folders in ``skip`` (real
+    paths, e.g. an output folder inside the inbox) are left out.
+    """
+    folders = [(os.path.abspath(root), '')]
+    while folders:
+        folder, subdir = folders.pop()
+        try:
+            entries = os.scandir(folder)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith(('.', '~$')):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if os.path.realpath(entry.path) not in skip:
+                            folders.append((entry.path, os.path.join(subdir, entry.name)))
+                    elif (os.path.splitext(entry.name)[1].lower() in DocumentConverter.SUPPORTED_READ_FORMATS
+                          and entry.is_file()):
+                        yield entry.path, subdir, entry.stat()
+                except OSError:
+                    continue  # removed while we were looking at it
+
+
+def _convert_file(path: str, subdir: str, output_formats: List[str],
+                  known_hash: Optional[str], output_stem: Optional[str] = None) -> Dict:
+    """Convert one file inside a worker, publishing each output with an atomic rename.
+
+    The converter writes into a hidden staging folder next to the final outputs, so
+    readers of the output folder only ever see complete files. If the content hash
+    matches ``known_hash`` the file was only touched and nothing is converted.
+    """
+    converter = worker_converter()
+    base_dir = converter.output_dir
+    start = time.perf_counter()
+    result = {'input': path, 'outputs': [], 'status': 'ok', 'error': None, 'sha256': None}
+    staging = None
+    try:
+        result['sha256'] = ConversionCache.hash_file(Path(path))
+        if result['sha256'] == known_hash:
+            result['status'] = 'unchanged'
+        else:
+            destination = base_dir / subdir
+            destination.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=destination))
+            converter.output_dir = staging
+            for staged in converter.convert_many(path, output_formats, output_stem=output_stem):
+                final = destination / Path(staged).name
+                os.replace(staged, final)
+                result['outputs'].append(str(final))
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        converter.output_dir = base_dir
+        if staging is not None:
+            shutil.rmtree(staging, ignore_errors=True)
+    result['seconds'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+class WatchFolder:
+    """Convert new and changed files from input folders into an output folder.
+
+    Each scan compares every file's size and mtime with the manifest; only files
+    that differ (or were converted with other formats or settings) are hashed,
+    and only those whose content changed are converted, on a pool of warm
+    workers. Restarting therefore costs one ``stat`` per file. Files that fail
+    are not retried until they change; outputs of deleted inputs are kept. With
+    ``limits`` the workers run in a ``SandboxPool`` and a file that goes over a
+    budget is recorded as failed.
+    """
+
+    def __init__(self, folders: Iterable[str], output_formats: List[str],
+                 output_dir: Optional[Path] = None, manifest_path: Optional[Path] = None,
+                 workers: int = 0, converter_options: Optional[dict] = None,
+                 settle: float = SETTLE_SECONDS,
+                 progress: Optional[Callable[[Dict], None]] = None,
+                 limits: Optional[ResourceLimits] = None):
+        self.folders = [Path(folder) for folder in folders]
+        missing = [str(folder) for folder in self.folders if not folder.is_dir()]
+        if missing:
+            raise ValueError(f"Not a folder: {', '.join(missing)}")
+        self.options = worker_options(converter_options)
+        converter = DocumentConverter(**self.options)
+        self.output_formats = converter.resolve_output_formats(output_formats)
+        # Outputs are stale if they were made for other formats or with other settings
+        self.tag = f"{','.join(self.output_formats)}|{converter.cache_tag()}"
+        self.output_dir = Path(output_dir or DocumentConverter.DEFAULT_OUTPUT_DIR)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest = Manifest(manifest_path or self.output_dir / MANIFEST_NAME)
+        self.workers = max(1, resolve_workers(workers))
+        self.settle = settle
+        self.progress = progress
+        self.limits = limits or ResourceLimits()
+        self.pool: Optional[Executor] = None
+        self.running: Dict[Future, Tuple[str, int, int]] = {}
+        self.queued: Set[str] = set()
+        self.attempts: Dict[Tuple[str, int, int], int] = {}
+        # Which input each output file belongs to, so inputs sharing a stem
+        # (report.docx, report.txt) don't overwrite each other's outputs
+        self.claims: Dict[str, str] = {}
+        for path, entry in self.manifest.entries.items():
+            for output in entry.outputs:
+                self.claims.setdefault(output.casefold(), path)
+
+    def _pool(self) -> Executor:
+        if self.pool is None:
+            # Workers write into the output folder and leave Ctrl+C to the daemon
+            initargs = ({**self.options, 'output_dir': str(self.output_dir)}, True)
+            self.pool = make_pool(self.workers, self.limits, initializer=init_worker, initargs=initargs)
+        return self.pool
+
+    def _output_stem(self, path: str, subdir: str) -> str:
+        """Name the outputs of ``path``, qualifying the name if another input has it."""
+        folder = self.output_dir / subdir
+        for stem in candidate_stems(path):
+            outputs = [str(folder / f"{stem}{fmt}").casefold() for fmt in self.output_formats]
+            if all(self.claims.get(output, path) == path for output in outputs):
+                self.claims.update(dict.fromkeys(outputs, path))
+                return stem
+
+    def scan(self) -> Dict[str, int]:
+        """Queue every new or changed file and forget deleted ones; return counts."""
+        stats = {'files': 0, 'up_to_date': 0, 'queued': 0, 'settling': 0, 'removed': 0}
+        skip = {os.path.realpath(self.output_dir)}
+        seen = set()
+        jobs: List[Tuple[str, str, int, int, Optional[str]]] = []
+        retries: List[Tuple[str, str, int, int, Optional[str]]] = []
+        now = time.time()
+        for folder in self.folders:
+            # With several inboxes, each gets its own folder of outputs
+            prefix = folder.resolve().name if len(self.folders) > 1 else ''
+            for path, subdir, stat in scan_folder(folder, skip):
+                stats['files'] += 1
+                seen.add(path)
+                if path in self.queued:
+                    continue
+                entry = self.manifest.get(path)
+                if (entry is not None and entry.tag == self.tag and entry.size == stat.st_size
+                        and entry.mtime_ns == stat.st_mtime_ns):
+                    stats['up_to_date'] += 1
+                    continue
+                if now - stat.st_mtime < self.settle:
+                    stats['settling'] += 1
+                    continue
+                known_hash = entry.sha256 if entry and entry.tag == self.tag and entry.status == 'ok' else None
+                job = (path, os.path.join(prefix, subdir), stat.st_size, stat.st_mtime_ns, known_hash)
+                (retries if (path, stat.st_size, stat.st_mtime_ns) in self.attempts else jobs).append(job)
+        # Files that were in a pool when it crashed are retried alone, one at a time,
+        # so a second crash is their own and not a neighbour's
+        if not jobs and not self.running:
+            jobs = retries[:1]
+        for path, subdir, size, mtime_ns, known_hash in jobs:
+            future = self._pool().submit(_convert_file, path, subdir, self.output_formats, known_hash,
+                                         self._output_stem(path, subdir))
+            self.running[future] = (path, size, mtime_ns)
+            self.queued.add(path)
+        stats['queued'] = len(jobs)
+        roots = tuple(os.path.join(os.path.abspath(folder), '') for folder in self.folders)
+        stats['removed'] = self.manifest.forget(
+            [path for path in self.manifest.entries if path.startswith(roots) and path not in seen])
+        self.manifest.commit()
+        return stats
+
+    def collect(self, timeout: Optional[float] = None) -> List[Dict]:
+        """Wait up to ``timeout`` for running conversions and record those that finished."""
+        if not self.running:
+            return []
+        done, _ = wait(list(self.running), timeout=timeout, return_when=FIRST_COMPLETED)
+        results = []
+        broken = False
+        for future in done:
+            path, size, mtime_ns = self.running.pop(future)
+            self.queued.discard(path)
+            if future.cancelled():
+                continue
+            crashed = False
+            try:
+                result = future.result()
+            except SandboxError as e:
+                # Going over a budget is final; a worker that just died is retried as below
+                crashed = not e.over_limit
+                result = {'input': path, 'outputs': [], 'status': 'failed', 'sha256': None,
+                          'error': str(e), 'seconds': None, 'limit': e.to_dict()}
+            except BrokenProcessPool:
+                crashed = broken = True
+            if crashed:
+                key = (path, size, mtime_ns)
+                self.attempts[key] = self.attempts.get(key, 0) + 1
+                if self.attempts[key] < MAX_ATTEMPTS:
+                    continue  # the next scan queues it again (on a fresh pool if this one broke)
+                result = {'input': path, 'outputs': [], 'status': 'failed', 'sha256': None,
+                          'error': 'Worker process crashed', 'seconds': None}
+            self.attempts.pop((path, size, mtime_ns), None)
+            outputs = result['outputs']
+            if result['status'] == 'unchanged':
+                entry = self.manifest.get(path)
+                outputs = entry.outputs if entry is not None else []
+            self.manifest.record(path, Entry(size, mtime_ns, result['sha256'], self.tag,
+                                             'failed' if result['status'] == 'failed' else 'ok',
+                                             outputs, result['error']))
+            results.append(result)
+            if self.progress:
+                self.progress(result)
+        if broken:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+        if results:
+            self.manifest.commit()
+        return results
+
+    def run_once(self) -> Dict[str, int]:
+        """Scan once and wait for every queued file, e.g. from cron; return counts."""
+        stats = self.scan()
+        for key in ('converted', 'unchanged', 'failed'):
+            stats[key] = 0
+        while self.running:
+            for result in self.collect():
+                status = 'converted' if result['status'] == 'ok' else result['status']
+                stats[status] += 1
+            if not self.running:
+                # Files whose worker crashed get their second attempt
+                stats['queued'] += self.scan()['queued']
+        return stats
+
+    def run(self, interval: float = DEFAULT_INTERVAL) -> None:
+        """Scan every ``interval`` seconds and convert changes until interrupted."""
+        next_scan = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= next_scan:
+                self.scan()
+                next_scan = now + interval
+            remaining = max(0.0, next_scan - time.monotonic())
+            if self.running:
+                self.collect(timeout=remaining)
+            else:
+                time.sleep(remaining)
+
+    def close(self) -> None:
+        """Finish running conversions, drop queued ones and save the manifest."""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            while self.running:
+                self.collect(timeout=0)
+            self.pool = None
+        self.manifest.close()
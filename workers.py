@@ -0,0 +1,42 @@
+"""
+Warm Conversion Workers
+The per-process bootstrap shared by every pool of conversion workers (batch runs,
+background jobs, watch folders).
+"""
+
+import signal
+from typing import Optional
+
+from converter import DocumentConverter
+
+_converter: Optional[DocumentConverter] = None
+
+
+def worker_options(converter_options: Optional[dict] = None) -> dict:
+    """Return the ``DocumentConverter`` options for a worker of a conversion pool.
+
+    The pool is already the parallelism, so unless told otherwise each worker
+    OCRs in-process instead of starting a pool of its own.
+    """
+    options = dict(converter_options or {})
+    options.setdefault('workers', 1)
+    return options
+
+
+def init_worker(options: dict, ignore_interrupt: bool = False) -> None:
+    """Build one converter per worker process and reuse it for every job.
+
+    With ``ignore_interrupt`` Ctrl+C is left to the parent, which can then let
+    running conversions finish.
+    """
+    global _converter
+    if ignore_interrupt:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _converter = DocumentConverter(**options)
+
+
+def worker_converter() -> DocumentConverter:
+    """Return the converter ``init_worker`` built in this process."""
+    if _converter is None:
+        raise RuntimeError("init_worker() has not run in this process")
+    return _converter